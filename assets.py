@@ -0,0 +1,56 @@
+import time
+
+import pygame
+
+
+# decodes, scales and converts every image once and hands out the same surface after that.
+# converting to the display's pixel format up front means blits don't convert every frame
+class AssetCache:
+    def __init__(self):
+        self.surfaces = {}
+        self.stats = {}  # (path, size) -> (load time in ms, bytes)
+
+    # returns the image at path scaled to size, or None if it couldn't be loaded.
+    # alpha keeps per pixel transparency for images like the fruit
+    def get(self, path, size=None, alpha=False):
+        key = (path, tuple(size) if size is not None else None)
+        if key in self.surfaces:
+            return self.surfaces[key]
+
+        start = time.perf_counter()
+        try:
+            img = pygame.image.load(path)
+        except (pygame.error, FileNotFoundError):
+            print(f"could not load {path}")
+            self.surfaces[key] = None
+            return None
+
+        if size is not None:
+            img = pygame.transform.scale(img, key[1])
+
+        # convert needs a display mode. before one is set the surface is kept as loaded
+        if pygame.display.get_surface() is not None:
+            img = img.convert_alpha() if alpha else img.convert()
+
+        self.surfaces[key] = img
+        self.stats[key] = ((time.perf_counter() - start) * 1000, img.get_pitch() * img.get_height())
+        return img
+
+    # loads a list of (path, size, alpha) ahead of time so nothing is decoded mid game
+    def preload(self, entries):
+        for path, size, alpha in entries:
+            self.get(path, size, alpha)
+
+    def report(self):
+        total_ms = 0
+        total_bytes = 0
+        print(f"{'asset':<32} {'size':>11} {'ms':>8} {'KB':>8}")
+        for (path, size), (ms, size_bytes) in self.stats.items():
+            size_text = f"{size[0]}x{size[1]}" if size is not None else "native"
+            print(f"{path:<32} {size_text:>11} {ms:>8.2f} {size_bytes / 1024:>8.1f}")
+            total_ms += ms
+            total_bytes += size_bytes
+        print(f"{'total':<32} {'':>11} {total_ms:>8.2f} {total_bytes / 1024:>8.1f}")
+
+
+assets = AssetCache()
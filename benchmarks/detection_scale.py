@@ -0,0 +1,81 @@
+# compares colour detection at reduced scales against native resolution. source is a camera index, video file or
+# recording. "synthetic" (the default) renders moving yellow blobs so it runs without a webcam.
+# run from the repo root: python -m benchmarks.detection_scale [source] [frame_count]
+import sys
+import time
+import math
+
+import cv2
+
+from main import detect_colour
+from settings import settings
+from benchmarks.vision import load_frames, synthetic_frames
+
+SCALES = [1, 0.5, 0.25]
+MATCH_DIST = 20  # pixels. a scaled blob this close to a native one counts as the same blob
+
+
+def run_scale(frames, scale, thresholds):
+    results = []
+    start = time.perf_counter()
+    for frame in frames:
+        rects = detect_colour(frame.copy(), 30, "yellow", *thresholds, scale=scale)[1][1:]
+        results.append([rect.center for rect in rects])
+    elapsed = time.perf_counter() - start
+    return results, elapsed / max(1, len(frames))
+
+
+# fraction of native blobs found at this scale and the mean centre error of the ones that were
+def compare(native, scaled):
+    found = 0
+    total = 0
+    error = 0
+    extra = 0
+    for native_centres, scaled_centres in zip(native, scaled):
+        total += len(native_centres)
+        unmatched = list(scaled_centres)
+        for cx, cy in native_centres:
+            best = None
+            for centre in unmatched:
+                dist = math.dist((cx, cy), centre)
+                if dist <= MATCH_DIST and (best is None or dist < best[0]):
+                    best = (dist, centre)
+            if best is not None:
+                found += 1
+                error += best[0]
+                unmatched.remove(best[1])
+        extra += len(unmatched)
+
+    recall = found / total if total else 1.0
+    mean_error = error / found if found else 0.0
+    return recall, mean_error, extra
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    thresholds = [settings.get(label) for label in ("sens", "min_s", "max_s", "min_v", "max_v")]
+    if source == "synthetic":
+        frames = [cv2.resize(frame, (640, 480), interpolation=cv2.INTER_AREA) for frame in synthetic_frames(count)]
+    else:
+        frames = load_frames(source, count)
+    if not frames:
+        print("no frames could be read from", source)
+        return
+
+    print(f"{len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    native, native_time = run_scale(frames, 1, thresholds)
+    print(f"{'scale':>6} {'ms/frame':>9} {'speedup':>8} {'recall':>7} {'err px':>7} {'extra':>6}")
+    for scale in SCALES:
+        if scale == 1:
+            results, frame_time = native, native_time
+        else:
+            results, frame_time = run_scale(frames, scale, thresholds)
+        recall, mean_error, extra = compare(native, results)
+        print(f"{scale:>6} {frame_time * 1000:>9.2f} {native_time / frame_time:>8.2f} {recall:>7.2%} {mean_error:>7.2f} {extra:>6}")
+
+
+if __name__ == "__main__":
+    main()
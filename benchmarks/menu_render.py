@@ -0,0 +1,67 @@
+# times drawing the pause menu widgets with the text caches warm and with them cleared every frame.
+# runs headless from the repo root: python -m benchmarks.menu_render [frames]
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from menu import Button, Slider
+
+WIDTH = 1920
+HEIGHT = 1080
+
+
+# the same widgets pause_menu builds
+def build_widgets():
+    back_button = Button(WIDTH // 2 - 200, HEIGHT // 2 + 240, 400, 100, "Back", font_path="Midorima.ttf", font_size=72)
+    labels = [
+        ("Volume", 100), ("Sensitivity", 15), ("Minimum value", 255),
+        ("Maximum value", 255), ("Minimum saturation", 255), ("Maximum saturation", 255)
+    ]
+    sliders = [
+        Slider(label, max_val // 2, WIDTH // 2 - 300, HEIGHT // 3 + 60 * i, 600, 40, font_size=36, max_val=max_val)
+        for i, (label, max_val) in enumerate(labels)
+    ]
+    return back_button, sliders
+
+
+def draw_frames(surface, back_button, sliders, frames, cached):
+    start = time.perf_counter()
+    for i in range(frames):
+        if not cached:
+            back_button.layout_key = None
+            for slider in sliders:
+                slider.label_key = None
+                slider.value_key = None
+
+        surface.fill((0, 0, 0))
+        back_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
+        for slider in sliders:
+            slider.draw(surface, (255, 255, 255))
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    back_button, sliders = build_widgets()
+
+    uncached = draw_frames(surface, back_button, sliders, frames, False)
+    cached = draw_frames(surface, back_button, sliders, frames, True)
+
+    print(f"{'':>10} {'ms/frame':>9} {'max fps':>8}")
+    print(f"{'uncached':>10} {uncached * 1000:>9.3f} {1 / uncached:>8.0f}")
+    print(f"{'cached':>10} {cached * 1000:>9.3f} {1 / cached:>8.0f}")
+    print(f"speedup: {uncached / cached:.1f}x")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# times the grid and union-find merge_rects against the old collidelistall version on noisy blobs.
+# run from the repo root: python -m benchmarks.merge_rects [blob_count] [repeats]
+import sys
+import time
+import random
+
+import pygame
+
+from blob_merge import merge_rects
+
+
+# the original O(n^2) merge from main.py, kept here as the baseline
+def legacy_merge_rects(rect_list):
+    copy_list = rect_list.copy()
+    collisions = []
+    kill_list = []
+
+    for i in range(len(copy_list)):
+        temp_collide = copy_list[i].collidelistall(copy_list)
+        temp_collide.sort()
+        if len(temp_collide) > 1:
+            if temp_collide not in collisions:
+                collisions.append(temp_collide)
+
+    for group in collisions:
+        x = min((copy_list[i].x for i in group))
+        y = min((copy_list[i].y for i in group))
+        merged_rect = pygame.Rect(
+            x,
+            y,
+            max((copy_list[i].x for i in group)) - x,
+            max((copy_list[i].y for i in group)) - y
+        )
+        copy_list.append(merged_rect)
+
+        for i in group:
+            kill_list.append(i)
+
+    kill_list = list(dict.fromkeys(kill_list))
+    kill_list.sort()
+    for i in range(len(kill_list) - 1, -1, -1):
+        copy_list.pop(kill_list[i])
+
+    return copy_list
+
+
+# a few real blobs broken into many overlapping pieces plus scattered specks of noise, like a badly lit webcam
+def noisy_blobs(count, width=640, height=480):
+    rects = []
+    centres = [(random.randint(50, width - 50), random.randint(50, height - 50)) for i in range(4)]
+    for i in range(count):
+        if random.random() < 0.6:
+            cx, cy = random.choice(centres)
+            rects.append(pygame.Rect(cx + random.randint(-40, 40), cy + random.randint(-40, 40), random.randint(10, 40), random.randint(10, 40)))
+        else:
+            rects.append(pygame.Rect(random.randint(0, width), random.randint(0, height), random.randint(2, 12), random.randint(2, 12)))
+    return rects
+
+
+def time_merge(func, cases):
+    start = time.perf_counter()
+    total = 0
+    for rects in cases:
+        total += len(func(rects))
+    return (time.perf_counter() - start) / len(cases), total / len(cases)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    random.seed(1)
+    print(f"{'blobs':>6} {'legacy ms':>10} {'new ms':>8} {'speedup':>8} {'legacy out':>11} {'new out':>8}")
+    for n in (count // 4, count // 2, count, count * 2):
+        cases = [noisy_blobs(n) for i in range(repeats)]
+        legacy_time, legacy_out = time_merge(legacy_merge_rects, cases)
+        new_time, new_out = time_merge(merge_rects, cases)
+        print(f"{n:>6} {legacy_time * 1000:>10.3f} {new_time * 1000:>8.3f} {legacy_time / new_time:>8.1f} {legacy_out:>11.1f} {new_out:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# compares detection on every frame with detection behind the MotionGate on idle and active footage. reports the
+# time and cpu time per frame, how many frames were skipped, how much of the frame was searched and how often the
+# gated blobs agree with the ungated ones.
+# run from the repo root: python -m benchmarks.motion_gate [idle_source] [active_source] [frame_count]
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import cv2
+
+from main import find_blobs, TRACKED_COLOURS, DETECT_SCALE, KERNEL_SIZE, COLOUR_TABLE
+from colour_table import get_table
+from motion import MotionGate
+from settings import settings
+from benchmarks.vision import load_frames, synthetic_frames
+
+SIZE = (640, 480)
+MATCH_DIST = 10  # pixels. gated and ungated blobs this close count as the same
+
+
+# a blade held still in front of a still background with a little sensor noise on every frame
+def idle_frames(count):
+    rng = np.random.default_rng(1)
+    scene = synthetic_frames(1, *SIZE)[0]
+    frames = []
+    for i in range(count):
+        noise = rng.normal(0, 2, scene.shape)
+        frames.append(np.clip(scene + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def active_frames(count):
+    return [cv2.resize(frame, SIZE, interpolation=cv2.INTER_AREA) for frame in synthetic_frames(count)]
+
+
+def run(frames, thresholds, table, gate):
+    results = []
+    searched = 0
+    skipped = 0
+    frame_area = frames[0].shape[0] * frames[0].shape[1]
+    blobs = None
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for frame in frames:
+        changed = gate.check(frame) if gate is not None else (0, 0, frame.shape[1], frame.shape[0])
+        if changed is None and blobs is not None:
+            skipped += 1
+        else:
+            if changed is None:
+                changed = (0, 0, frame.shape[1], frame.shape[0])
+            searched += changed[2] * changed[3]
+            blobs = find_blobs(frame, [changed], DETECT_SCALE, KERNEL_SIZE, thresholds, table)[0]
+        results.append(blobs.centroids)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "ms": elapsed / len(frames) * 1000,
+        "cpu ms": cpu / len(frames) * 1000,
+        "skipped": skipped / len(frames),
+        "searched": searched / (frame_area * len(frames)),
+        "centres": results,
+    }
+
+
+# fraction of frames where every ungated blob has a gated one within MATCH_DIST and the counts are equal
+def agreement(reference, gated):
+    same = 0
+    for ref, got in zip(reference, gated):
+        if len(ref) != len(got):
+            continue
+        if len(ref) == 0 or all(np.min(np.hypot(*(got - centre).T)) <= MATCH_DIST for centre in ref):
+            same += 1
+    return same / len(reference)
+
+
+def main():
+    idle_source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    active_source = sys.argv[2] if len(sys.argv) > 2 else "synthetic"
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+
+    footage = [
+        ("idle", idle_frames(count) if idle_source == "synthetic" else load_frames(idle_source, count)),
+        ("active", active_frames(count) if active_source == "synthetic" else load_frames(active_source, count)),
+    ]
+
+    hue = TRACKED_COLOURS[0][0]
+    thresholds = tuple(settings.get(label) for label in ("sens", "min_s", "max_s", "min_v", "max_v"))
+    table = get_table(hue, *thresholds) if COLOUR_TABLE else None
+
+    print(f"{'footage':>8} {'mode':>7} {'ms/frame':>9} {'cpu ms':>7} {'skipped':>8} {'searched':>9} {'agree':>6}")
+    for name, frames in footage:
+        if not frames:
+            print("no frames could be read for", name)
+            continue
+
+        reference = run(frames, thresholds, table, None)
+        gated = run(frames, thresholds, table, MotionGate())
+        for mode, stats in (("always", reference), ("gated", gated)):
+            print(
+                f"{name:>8} {mode:>7} {stats['ms']:>9.3f} {stats['cpu ms']:>7.3f} {stats['skipped']:>8.0%} "
+                f"{stats['searched']:>9.0%} {agreement(reference['centres'], stats['centres']):>6.0%}"
+            )
+        print(f"{name:>8} cpu saved {1 - gated['cpu ms'] / reference['cpu ms']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
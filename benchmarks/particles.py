@@ -0,0 +1,49 @@
+# measures how many live particles the ParticleSystem can update, cull and draw inside one camera frame.
+# runs headless: python -m benchmarks.particles [camera_fps]
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from particles import ParticleSystem
+
+WIDTH = 600
+HEIGHT = 500
+
+
+def main():
+    camera_fps = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    budget = 1 / camera_fps
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    screen = pygame.Surface((WIDTH, HEIGHT))
+
+    print(f"frame budget at {camera_fps:g} fps: {budget * 1000:.1f} ms")
+    print(f"{'live':>7} {'ms/frame':>9} {'fps':>8} {'in budget':>10}")
+
+    for live in (1000, 5000, 10000, 20000, 50000):
+        # gravity off so the population holds steady while it is timed
+        particles = ParticleSystem(gravity=0)
+        for i in range(live // 300):
+            particles.emit((WIDTH // 2, HEIGHT // 2), 300, 0.5, (255, 80, 80))
+
+        frames = 200
+        start = time.perf_counter()
+        for i in range(frames):
+            screen.fill((0, 0, 0))
+            particles.update()
+            particles.cull(HEIGHT)
+            particles.draw(screen)
+        frame_time = (time.perf_counter() - start) / frames
+
+        print(f"{len(particles):>7} {frame_time * 1000:>9.3f} {1 / frame_time:>8.0f} {str(frame_time <= budget):>10}")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# times detection for 1, 2 and 4 tracked colours through the Segmenter against running find_blobs once per
+# colour. every colour is a disc drifting over a noisy background. "lost" searches the whole frame for every
+# colour, "tracked" searches the window around each disc like the game does once the blades are found.
+# run from the repo root: python -m benchmarks.segment_colours [frame_count]
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import cv2
+
+from main import find_blobs, get_colour, DETECT_SCALE, KERNEL_SIZE
+from segment import Segmenter
+from settings import settings
+
+SIZE = (640, 480)
+HUES = [(30, "yellow"), (110, "blue"), (60, "green"), (160, "pink")]
+WINDOW = 120  # half size of a tracked search window, like ROI_MARGIN
+
+
+def disc_centres(i, count):
+    w, h = SIZE
+    centres = []
+    for j in range(count):
+        t = i / 30 + j * 1.6
+        centres.append((int(w / 2 + w / 3 * np.sin(0.9 * t + j)), int(h / 2 + h / 3 * np.sin(1.3 * t + 2 * j))))
+    return centres
+
+
+def make_frames(frame_count, colour_count):
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 90, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    frames = []
+    for i in range(frame_count):
+        frame = background.copy()
+        for (hue, name), centre in zip(HUES, disc_centres(i, colour_count)):
+            bgr = cv2.cvtColor(np.uint8([[[hue, 220, 220]]]), cv2.COLOR_HSV2BGR)[0, 0]
+            cv2.circle(frame, centre, 30, tuple(int(c) for c in bgr), -1)
+        frames.append(frame)
+    return frames
+
+
+def windows(i, count):
+    w, h = SIZE
+    rois = []
+    for x, y in disc_centres(i, count):
+        x1, y1 = max(0, x - WINDOW), max(0, y - WINDOW)
+        rois.append((x1, y1, min(w, x + WINDOW) - x1, min(h, y + WINDOW) - y1))
+    return rois
+
+
+def run(frames, colours, tracked, segmenter):
+    count = len(colours)
+    start = time.perf_counter()
+    found = 0
+    for i, frame in enumerate(frames):
+        rois = windows(i, count) if tracked else [None] * count
+        if segmenter is not None:
+            blobs = segmenter.segment(frame, rois, DETECT_SCALE, KERNEL_SIZE)
+        else:
+            blobs = []
+            for colour, roi in zip(colours, rois):
+                blobs.append(colour.process(frame, roi, DETECT_SCALE, KERNEL_SIZE).get_blobs())
+        found += sum(len(b.areas) for b in blobs)
+    return (time.perf_counter() - start) / len(frames) * 1000, found / len(frames)
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    thresholds = tuple(settings.get(label) for label in ("sens", "min_s", "max_s", "min_v", "max_v"))
+
+    print(f"{SIZE[0]}x{SIZE[1]}, detect scale {DETECT_SCALE}, {frame_count} frames")
+    print(f"{'colours':>7} {'search':>8} {'separate ms':>12} {'segmenter ms':>13} {'vs 1 colour':>12} {'blobs':>6}")
+    single = {}  # segmenter time with one colour for each kind of search
+    for count in (1, 2, 4):
+        frames = make_frames(frame_count, count)
+        colours = [get_colour(hue, name, *thresholds) for hue, name in HUES[:count]]
+        segmenter = Segmenter(colours)
+        for tracked in (False, True):
+            # one untimed frame so buffers are allocated before timing
+            find_blobs(frames[0], [None] * count, DETECT_SCALE, KERNEL_SIZE, thresholds, segmenter=segmenter)
+
+            separate, _ = run(frames, colours, tracked, None)
+            together, blobs = run(frames, colours, tracked, segmenter)
+            base = single.setdefault(tracked, together)
+            label = "tracked" if tracked else "lost"
+            print(f"{count:>7} {label:>8} {separate:>12.3f} {together:>13.3f} {together / base:>11.2f}x {blobs:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
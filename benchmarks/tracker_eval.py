@@ -0,0 +1,101 @@
+# measures how far behind the real blade the tracked position is, and how much it jitters, for the kalman
+# BladeTracker and for the old exponential blend. traces are csv files of t,x,y (seconds, pixels) for the true
+# blade path. without any, synthetic swipes are used.
+# run from the repo root: python -m benchmarks.tracker_eval [trace.csv ...]
+import sys
+import math
+
+import numpy as np
+
+from tracker import BladeTracker
+
+CAMERA_FPS = 30
+DISPLAY_FPS = 60
+LATENCY = 0.06  # seconds from the scene to the detection being available
+NOISE = 3  # pixels of detection noise
+DROPOUT = 0.05  # chance a frame misses the blade
+
+
+def load_trace(path):
+    data = np.loadtxt(path, delimiter=",", skiprows=1)
+    return data[:, 0], data[:, 1:3]
+
+
+# figure of eight swipes with a few fast slashes, sampled at 1 kHz
+def synthetic_trace(seconds=10):
+    t = np.arange(0, seconds, 0.001)
+    x = 300 + 220 * np.sin(2 * np.pi * 0.7 * t) + 60 * np.tanh(8 * np.sin(2 * np.pi * 0.23 * t))
+    y = 250 + 150 * np.sin(2 * np.pi * 1.4 * t)
+    return t, np.column_stack((x, y))
+
+
+def sample(t, path, times):
+    return np.column_stack((np.interp(times, t, path[:, 0]), np.interp(times, t, path[:, 1])))
+
+
+# the blend main.py used before the tracker. every detection decays from radius 8 by 0.5 a frame and pulls the
+# average towards it by sqrt(radius) / 16
+class LegacyBlend:
+    def __init__(self, pos):
+        self.avg = np.array(pos, float)
+        self.points = []
+
+    def update(self, measurement, t):
+        if measurement is not None:
+            self.points.append([measurement[0], measurement[1], 8.0])
+        for point in self.points:
+            self.avg += (np.array(point[:2]) - self.avg) * math.sqrt(point[2]) / 16
+            point[2] -= 0.5
+        self.points = [point for point in self.points if point[2] > 0]
+
+    def predict(self, t):
+        return self.avg.copy()
+
+
+def run(filter_, t, path, rng):
+    frame_times = np.arange(t[0], t[-1] - LATENCY, 1 / CAMERA_FPS)
+    seen = sample(t, path, frame_times) + rng.normal(0, NOISE, (len(frame_times), 2))
+    missed = rng.random(len(frame_times)) < DROPOUT
+
+    render_times = np.arange(frame_times[0] + LATENCY, t[-1], 1 / DISPLAY_FPS)
+    estimates = []
+    frame = 0
+    for now in render_times:
+        # hand over every detection that has made it through the pipeline by now
+        while frame < len(frame_times) and frame_times[frame] + LATENCY <= now:
+            filter_.update(None if missed[frame] else seen[frame], frame_times[frame])
+            frame += 1
+        estimates.append(filter_.predict(now))
+
+    return render_times, np.array(estimates)
+
+
+# lag is the delay that best lines the estimate up with the truth. jitter is how much rougher the estimate's
+# frame to frame motion is than the truth's
+def score(t, path, render_times, estimates):
+    truth = sample(t, path, render_times)
+    error = np.sqrt(((estimates - truth)**2).sum(axis=1)).mean()
+
+    shifts = np.arange(0, 0.3, 0.002)
+    shift_error = [((estimates - sample(t, path, render_times - s))**2).sum(axis=1).mean() for s in shifts]
+    lag = shifts[int(np.argmin(shift_error))]
+
+    jitter = np.sqrt((np.diff(estimates, 2, axis=0)**2).sum(axis=1).mean())
+    base_jitter = np.sqrt((np.diff(truth, 2, axis=0)**2).sum(axis=1).mean())
+    return lag, error, jitter - base_jitter
+
+
+def main():
+    traces = [(path, *load_trace(path)) for path in sys.argv[1:]] or [("synthetic", *synthetic_trace())]
+    rng = np.random.default_rng(0)
+
+    print(f"camera {CAMERA_FPS} fps, display {DISPLAY_FPS} fps, latency {LATENCY * 1000:.0f} ms, noise {NOISE} px, dropout {DROPOUT:.0%}")
+    print(f"{'trace':<16} {'filter':<8} {'lag ms':>7} {'err px':>7} {'jitter px':>10}")
+    for name, t, path in traces:
+        for label, filter_ in (("blend", LegacyBlend(path[0])), ("kalman", BladeTracker(path[0]))):
+            lag, error, jitter = score(t, path, *run(filter_, t, path, rng))
+            print(f"{name:<16} {label:<8} {lag * 1000:>7.0f} {error:>7.1f} {jitter:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# times every stage of colour detection on recorded footage without a webcam or a window.
+# source is anything cv2.VideoCapture opens, like a video file or an image sequence such as frames/%04d.png, or a
+# recording made with F5 in the game.
+# "synthetic" (the default) renders moving yellow blobs instead so the numbers can be compared between machines.
+# the main measurement is the path the game runs, find_blobs: resize, classify, dilate and connected components.
+# it is run with opencv's cvtColor + inRange and with the compiled ColourTable so main.COLOUR_TABLE can be set to
+# whichever wins. findContours and merge_rects, which the game used before connected components, are timed on
+# the same mask for comparison only.
+# results are printed as a table and written as json when a path is given so releases can be diffed.
+# dilation picks how Colour dilates: square (the game's default), separable or iterated.
+# run from the repo root: python -m benchmarks.vision [source] [frame_count] [results.json] [dilation]
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import cv2
+
+from main import find_blobs, get_colour, KERNEL_SIZE, DETECT_SCALE, DILATION, TRACKED_COLOURS
+from blob_merge import merge_rects
+from colour_table import get_table
+from settings import settings
+from recording import open_capture
+
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720)]
+GAME_STAGES = ["resize", "classify", "dilate", "components"]
+LEGACY_STAGES = ["findContours", "merge_rects"]
+
+
+def load_frames(source, count):
+    camera = open_capture(source, realtime=False)
+    frames = []
+    while len(frames) < count:
+        ret, frame = camera.read()
+        if not ret:
+            break
+        frames.append(cv2.flip(frame, 1))
+    camera.release()
+    return frames
+
+
+# a few yellow blobs drifting over a noisy background, sized like a blade held at arm's length
+def synthetic_frames(count, width=1280, height=720):
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 90, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        for j in range(3):
+            t = i / 30 + j * 2.1
+            x = int(width / 2 + width / 3 * np.sin(0.9 * t + j))
+            y = int(height / 2 + height / 3 * np.sin(1.7 * t))
+            cv2.circle(frame, (x, y), height // 14, (50, 200, 200), -1)
+        frames.append(frame)
+    return frames
+
+
+# runs one frame through the same stages as Colour.process + Colour.get_blobs, which is what find_blobs does in
+# the game, and yields after each one so the caller can time or measure it. the order matches GAME_STAGES
+def game_pipeline(frame, colour, scale):
+    small = colour.shrink(frame, None, scale)
+    yield
+
+    # cvtColor + inRange, or one table lookup when the colour has a ColourTable
+    colour.threshold(colour.convert(small))
+    yield
+
+    colour.dilate_colour(KERNEL_SIZE)
+    yield
+
+    colour.get_blobs()
+    yield
+
+
+# the old contour backend on the mask game_pipeline just made. boxes are drawn on scratch instead of the frame
+# so later passes see the same frames. the order matches LEGACY_STAGES
+def legacy_pipeline(scratch, colour):
+    rects = colour.get_contour(scratch)[1][1:]
+    yield
+
+    merge_rects(rects)
+    yield
+
+
+def time_stages(frames, stage_count, run):
+    totals = np.zeros(stage_count)
+    for frame in frames:
+        stamp = time.perf_counter()
+        for i, _ in enumerate(run(frame)):
+            now = time.perf_counter()
+            totals[i] += now - stamp
+            stamp = now
+    return totals / len(frames)
+
+
+# bytes each stage allocates on top of what was live when it started, including numpy and opencv buffers.
+# run separately from the timing pass since tracemalloc slows every allocation down
+def measure_allocations(frames, stage_count, run):
+    totals = np.zeros(stage_count)
+    tracemalloc.start()
+    for frame in frames:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        for i, _ in enumerate(run(frame)):
+            current, peak = tracemalloc.get_traced_memory()
+            totals[i] += peak - base
+            tracemalloc.reset_peak()
+            base = current
+    tracemalloc.stop()
+    return totals / len(frames)
+
+
+# the game's own call, timed as a whole
+def time_find_blobs(frames, thresholds, table):
+    start = time.perf_counter()
+    for frame in frames:
+        find_blobs(frame, [None], DETECT_SCALE, KERNEL_SIZE, thresholds, table)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def measure(frames, stages, run):
+    # one untimed frame so first call setup inside opencv and the colour's buffers are not counted
+    for _ in run(frames[0]):
+        pass
+    times = time_stages(frames, len(stages), run)
+    allocations = measure_allocations(frames, len(stages), run)
+    return {
+        name: {"ms": stage_time * 1000, "alloc_bytes": int(allocated)}
+        for name, stage_time, allocated in zip(stages, times, allocations)
+    }
+
+
+def print_stages(label, path, stages):
+    for name, stage in stages.items():
+        print(f"{label:>10} {path:>7} {name:>13} {stage['ms']:>9.3f} {stage['alloc_bytes'] / 1024:>9.1f}")
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    output = sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] != "-" else None
+    dilation = sys.argv[4] if len(sys.argv) > 4 else DILATION
+
+    if source == "synthetic":
+        frames = synthetic_frames(count)
+    else:
+        frames = load_frames(source, count)
+    if not frames:
+        print("no frames could be read from", source)
+        return
+
+    hue, name = TRACKED_COLOURS[0]
+    thresholds = tuple(settings.get(label) for label in ("sens", "min_s", "max_s", "min_v", "max_v"))
+    classifiers = [("opencv", None), ("table", get_table(hue, *thresholds))]
+
+    print(f"{len(frames)} frames from {source}, detect scale {DETECT_SCALE}, kernel {KERNEL_SIZE}, {dilation} dilation")
+    print(f"{'resolution':>10} {'path':>7} {'stage':>13} {'ms/frame':>9} {'alloc KB':>9}")
+
+    results = []
+    for width, height in RESOLUTIONS:
+        resized = [cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA) for frame in frames]
+        label = f"{width}x{height}"
+        result = {"width": width, "height": height, "paths": {}}
+
+        for path, table in classifiers:
+            # the same Colour find_blobs uses, switched to this classifier
+            colour = get_colour(hue, name, *thresholds, table)
+            colour.dilation = dilation
+
+            stages = measure(resized, GAME_STAGES, lambda frame: game_pipeline(frame, colour, DETECT_SCALE))
+            frame_time = time_find_blobs(resized, thresholds, table)
+            print_stages(label, path, stages)
+            print(f"{label:>10} {path:>7} {'find_blobs':>13} {frame_time * 1000:>9.3f} {'':>9}   {1 / frame_time:.0f} fps")
+
+            result["paths"][path] = {"ms_per_frame": frame_time * 1000, "fps": 1 / frame_time, "stages": stages}
+
+        # the legacy stages follow the opencv mask, so they are run after it on every frame
+        colour = get_colour(hue, name, *thresholds)
+        scratch = np.empty_like(resized[0])
+
+        def legacy(frame):
+            for _ in game_pipeline(frame, colour, DETECT_SCALE):
+                pass
+            yield from legacy_pipeline(scratch, colour)
+
+        stages = measure(resized, LEGACY_STAGES, legacy)
+        print_stages(label, "legacy", stages)
+        result["paths"]["legacy"] = {"stages": stages}
+
+        results.append(result)
+
+    if output is not None:
+        report = {
+            "source": source,
+            "frames": len(frames),
+            "detect_scale": DETECT_SCALE,
+            "kernel_size": KERNEL_SIZE,
+            "dilation": dilation,
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+        print("results written to", output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# compares detection in the game process with detection in the VisionWorker process. a 30 fps camera is
+# simulated from recorded or synthetic frames while the loop also updates and draws particles like a busy game
+# frame. reports game loop fps, how late blobs arrive after their frame was captured and how many frames got
+# detected. runs headless: python -m benchmarks.worker_latency [source] [seconds] [particles]
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import cv2
+import pygame
+
+from main import find_blobs, TRACKED_COLOURS, DETECT_SCALE, KERNEL_SIZE, COLOUR_TABLE
+from colour_table import get_table
+from particles import ParticleSystem
+from settings import settings
+from worker import VisionWorker
+from benchmarks.vision import load_frames, synthetic_frames
+
+CAMERA_FPS = 30
+WIDTH = 600
+HEIGHT = 500
+
+
+def run(frames, thresholds, table, seconds, load, use_worker):
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    particles = ParticleSystem(gravity=0)
+    for i in range(load // 300):
+        particles.emit((WIDTH // 2, HEIGHT // 2), 300, 0.5, (255, 80, 80))
+
+    worker = None
+    if use_worker:
+        worker = VisionWorker(frames[0].shape, find_blobs, thresholds, table, None)
+        # wait for the process to come up so its start isn't timed
+        worker.submit(frames[0], 0.0, [None], DETECT_SCALE, KERNEL_SIZE)
+        while worker.poll() is None:
+            time.sleep(0.001)
+
+    period = 1 / CAMERA_FPS
+    loop_times = []
+    latencies = []
+    index = 0
+
+    start = time.perf_counter()
+    next_frame = start
+    last = start
+    while last - start < seconds:
+        now = time.perf_counter()
+        if now >= next_frame:
+            # frames the loop was too slow to take are skipped like the capture thread drops them
+            while next_frame + period <= now:
+                next_frame += period
+            captured = next_frame
+            next_frame += period
+
+            frame = frames[index % len(frames)]
+            index += 1
+            if worker is None:
+                find_blobs(frame, [None], DETECT_SCALE, KERNEL_SIZE, thresholds, table)
+                latencies.append(time.perf_counter() - captured)
+            else:
+                worker.submit(frame, captured, [None], DETECT_SCALE, KERNEL_SIZE)
+
+        if worker is not None:
+            result = worker.poll()
+            if result is not None:
+                latencies.append(time.perf_counter() - result[0])
+
+        screen.fill((0, 0, 0))
+        particles.update()
+        particles.cull(HEIGHT)
+        particles.draw(screen)
+
+        now = time.perf_counter()
+        loop_times.append(now - last)
+        last = now
+
+    if worker is not None:
+        worker.close()
+
+    loop_times = np.array(loop_times)
+    latencies = np.array(latencies)
+    elapsed = last - start
+    return {
+        "fps": len(loop_times) / elapsed,
+        "loop p95": np.percentile(loop_times, 95) * 1000,
+        "latency": latencies.mean() * 1000,
+        "latency p95": np.percentile(latencies, 95) * 1000,
+        "detections": len(latencies) / elapsed,
+    }
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    load = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+
+    if source == "synthetic":
+        frames = [cv2.resize(frame, (640, 480)) for frame in synthetic_frames(90)]
+    else:
+        frames = load_frames(source, 300)
+    if not frames:
+        print("no frames could be read from", source)
+        return
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    hue = TRACKED_COLOURS[0][0]
+    thresholds = tuple(settings.get(label) for label in ("sens", "min_s", "max_s", "min_v", "max_v"))
+    table = get_table(hue, *thresholds) if COLOUR_TABLE else None
+
+    print(f"{frames[0].shape[1]}x{frames[0].shape[0]} camera at {CAMERA_FPS} fps, {load} particles, {seconds:g} s each")
+    print(f"{'mode':>10} {'loop fps':>9} {'loop p95':>9} {'latency':>8} {'lat p95':>8} {'detect/s':>9}")
+    for name, use_worker in (("in process", False), ("worker", True)):
+        stats = run(frames, thresholds, table, seconds, load, use_worker)
+        print(
+            f"{name:>10} {stats['fps']:>9.1f} {stats['loop p95']:>7.2f}ms {stats['latency']:>6.2f}ms "
+            f"{stats['latency p95']:>6.2f}ms {stats['detections']:>9.1f}"
+        )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import pygame
+
+
+# disjoint set forest with path halving and union by size
+class DisjointSet:
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+# combines every group of overlapping rects into one rect covering the group, including chains where
+# a overlaps b and b overlaps c. rects are bucketed into a uniform grid about the size of a typical rect, so each
+# one is only compared with the rects sharing its cells. once a rect covers a whole cell, everything else reaching
+# into that cell overlaps it, so the cell just joins them to its group instead of comparing every pair. crowded
+# clusters of blobs fill up with covered cells, which keeps the merge near linear however many blobs there are
+def merge_rects(rect_list):
+    n = len(rect_list)
+    if n < 2:
+        return list(rect_list)
+
+    sides = sorted(min(rect.w, rect.h) for rect in rect_list)
+    cell = max(4, sides[n // 2])
+
+    groups = DisjointSet(n)
+    buckets = {}  # cell -> rects reaching into it
+    covered = {}  # cell -> a rect covering all of it
+
+    for i, rect in enumerate(rect_list):
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        # empty rects don't overlap anything and stay on their own
+        if right <= left or bottom <= top:
+            continue
+
+        for cx in range(left // cell, (right - 1) // cell + 1):
+            spans_x = left <= cx * cell and right >= (cx + 1) * cell
+            for cy in range(top // cell, (bottom - 1) // cell + 1):
+                key = (cx, cy)
+                owner = covered.get(key)
+                if owner is not None:
+                    groups.union(i, owner)
+                    continue
+
+                bucket = buckets.setdefault(key, [])
+                root = groups.find(i)
+                for j in bucket:
+                    # already joined through another cell
+                    if groups.find(j) == root:
+                        continue
+                    other = rect_list[j]
+                    if other.left < right and left < other.right and other.top < bottom and top < other.bottom:
+                        groups.union(i, j)
+                        root = groups.find(i)
+
+                if spans_x and top <= cy * cell and bottom >= (cy + 1) * cell:
+                    for j in bucket:
+                        groups.union(i, j)
+                    covered[key] = i
+                    del buckets[key]
+                else:
+                    bucket.append(i)
+
+    # build one rect per group, keeping the order groups first appear in
+    merged = {}
+    for i in range(n):
+        root = groups.find(i)
+        if root in merged:
+            merged[root].union_ip(rect_list[i])
+        else:
+            merged[root] = pygame.Rect(rect_list[i])
+
+    return list(merged.values())
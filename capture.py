@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+
+from recording import open_capture
+
+
+# reads a cv2.VideoCapture, or anything with the same read/get/release calls, on a background thread so the game
+# loop never waits on the webcam. only the newest frames are kept. anything older is dropped instead of queued.
+# frames are stamped when they arrive, or with their recorded time when the camera is a ReplayCapture
+class FrameGrabber:
+    def __init__(self, camera, buffer_size=2):
+        self.camera = camera
+        self.clock = getattr(camera, "timestamp", time.perf_counter)
+        self.buffer = deque(maxlen=buffer_size)
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+
+        self.frame_id = 0  # number of frames captured so far
+        self.read_id = 0  # frame_id of the last frame handed to the game
+        self.dropped = 0  # frames that were captured but never read
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return self
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while self.running:
+            ret, frame = self.camera.read()
+
+            if not ret:
+                # camera hiccup or end of a video file. avoid spinning a core
+                time.sleep(0.005)
+                continue
+            timestamp = self.clock()
+
+            with self.lock:
+                self.frame_id += 1
+                self.buffer.append((self.frame_id, timestamp, frame))
+                self.new_frame.notify_all()
+
+    # returns (ret, frame, timestamp) for the newest frame. blocks up to timeout seconds for the first one
+    def read(self, timeout=1.0):
+        with self.lock:
+            if not self.buffer:
+                self.new_frame.wait(timeout)
+            if not self.buffer:
+                return False, None, 0.0
+
+            frame_id, timestamp, frame = self.buffer[-1]
+
+            # every unread frame between the last read and this one never made it to the game
+            if frame_id > self.read_id:
+                self.dropped += frame_id - self.read_id - 1
+            self.read_id = frame_id
+
+        return True, frame, timestamp
+
+    # True when a frame newer than the last one read is waiting
+    def has_new(self):
+        with self.lock:
+            return bool(self.buffer) and self.buffer[-1][0] > self.read_id
+
+    def get(self, prop):
+        return self.camera.get(prop)
+
+    def isOpened(self):
+        return self.camera.isOpened()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def release(self):
+        self.stop()
+        self.camera.release()
+        if self.frame_id:
+            print(f"{self.dropped} of {self.frame_id} camera frames dropped")
+
+
+# hands every frame of a capture to the game in order on the game's own thread. nothing is dropped and nothing
+# waits for real time, so two runs over the same recording see exactly the same frames.
+# has_new moves on to the next frame, so each one is new exactly once, and read returns it as often as asked
+class DirectCapture:
+    def __init__(self, camera):
+        self.camera = camera
+        self.clock = getattr(camera, "timestamp", time.perf_counter)
+        self.dropped = 0
+        self.frame_id = 0
+        self.started = False
+        self.current = self._next()
+
+    def _next(self):
+        ret, frame = self.camera.read()
+        if not ret:
+            return False, None, 0.0
+        self.frame_id += 1
+        return True, frame, self.clock()
+
+    def read(self, timeout=None):
+        return self.current
+
+    def has_new(self):
+        if self.started:
+            self.current = self._next()
+        self.started = True
+        return self.current[0]
+
+    def get(self, prop):
+        return self.camera.get(prop)
+
+    def isOpened(self):
+        return self.camera.isOpened()
+
+    def release(self):
+        self.camera.release()
+        print(f"{self.frame_id} frames replayed")
+
+
+# source is a camera index, a video file or a recording made with FrameRecorder. every_frame reads it in order as
+# fast as the game runs instead of in real time, for comparing runs on the same recording
+def open_camera(source=0, every_frame=False):
+    if every_frame:
+        return DirectCapture(open_capture(source, realtime=False))
+    return FrameGrabber(open_capture(source)).start()
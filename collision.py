@@ -0,0 +1,80 @@
+import math
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+# index of the circle that was hit, the point on the swipe closest to its centre and the swipe's angle
+Hit = namedtuple("Hit", ["index", "point", "angle"])
+
+
+# uniform grid over the play area. each circle is filed under every cell its bounding box touches so a swipe
+# only has to be tested against circles in the cells around it
+class SpatialGrid:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+
+    def build(self, centres, radii):
+        self.cells.clear()
+        if len(centres) == 0:
+            return
+
+        radii = np.broadcast_to(radii, len(centres))
+        low = np.floor((centres - radii[:, None]) / self.cell_size).astype(int).tolist()
+        high = np.floor((centres + radii[:, None]) / self.cell_size).astype(int).tolist()
+
+        for i, ((x1, y1), (x2, y2)) in enumerate(zip(low, high)):
+            for cx in range(x1, x2 + 1):
+                for cy in range(y1, y2 + 1):
+                    self.cells[(cx, cy)].append(i)
+
+    # indices of circles that might touch the box from (x1, y1) to (x2, y2) grown by margin
+    def query(self, x1, y1, x2, y2, margin=0):
+        cx1 = math.floor((min(x1, x2) - margin) / self.cell_size)
+        cx2 = math.floor((max(x1, x2) + margin) / self.cell_size)
+        cy1 = math.floor((min(y1, y2) - margin) / self.cell_size)
+        cy2 = math.floor((max(y1, y2) + margin) / self.cell_size)
+
+        found = set()
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                found.update(self.cells.get((cx, cy), ()))
+        return sorted(found)
+
+
+# angle of a swipe moving by (d_x, d_y) with y pointing down, as used to split a cut target
+def swipe_angle(d_x, d_y):
+    if d_x == 0:
+        return math.pi / 2
+    return math.atan(-d_y / d_x)
+
+
+# tests the blade swept from p0 to p1 against every candidate circle at once. a circle is hit when the closest
+# point of the segment is within its radius plus the blade's, so fast swipes can't skip over a target
+def sweep_hits(p0, p1, blade_rad, centres, radii, grid=None):
+    if len(centres) == 0:
+        return []
+
+    radii = np.broadcast_to(np.asarray(radii, float), len(centres))
+    if grid is None:
+        candidates = np.arange(len(centres))
+    else:
+        candidates = np.array(grid.query(p0[0], p0[1], p1[0], p1[1], blade_rad + radii.max()), int)
+        if len(candidates) == 0:
+            return []
+
+    p0 = np.asarray(p0, float)
+    d = np.asarray(p1, float) - p0
+    length2 = d @ d
+
+    to_centre = centres[candidates] - p0
+    if length2 == 0:
+        t = np.zeros(len(candidates))
+    else:
+        t = np.clip(to_centre @ d / length2, 0, 1)
+    closest = p0 + t[:, None] * d
+    dist2 = ((centres[candidates] - closest)**2).sum(axis=1)
+    hit = dist2 < (radii[candidates] + blade_rad)**2
+
+    angle = swipe_angle(d[0], d[1])
+    return [Hit(int(i), tuple(point), angle) for i, point in zip(candidates[hit], closest[hit])]
@@ -0,0 +1,70 @@
+import functools
+
+import numpy as np
+import cv2
+
+
+# a compiled colour classifier. every quantized BGR colour is converted to HSV and tested against the
+# thresholds once, so classifying a frame is a single table lookup instead of cvtColor + inRange.
+# the lookup is a numpy gather and has measured about 3x slower than opencv's vectorised cvtColor + inRange, and
+# quantizing to bits per channel misclassifies a fraction of a percent of pixels near the thresholds. the game
+# only uses it when main.COLOUR_TABLE is on
+class ColourTable:
+    def __init__(self, h, sens, min_s, max_s, min_v, max_v, bits=6):
+        self.bits = bits
+        self.shift = 8 - bits
+        self.table = self.build(h, sens, min_s, max_s, min_v, max_v)
+
+    def build(self, h, sens, min_s, max_s, min_v, max_v):
+        hsv = quantized_hsv(self.bits)
+        return np.where(in_range(hsv, h, sens, min_s, max_s, min_v, max_v), 255, 0).astype(np.uint8)
+
+    # returns a 0/255 mask the same shape as the frame like cv2.inRange does. out receives the mask and index
+    # is intp scratch of the same shape. when both are given nothing is allocated
+    def apply(self, frame_bgr, out=None, index=None):
+        shape = frame_bgr.shape[:2]
+        if out is None:
+            out = np.empty(shape, np.uint8)
+        if index is None:
+            index = np.empty(shape, np.intp)
+
+        # flat table index b << 2 * bits | g << bits | r, built up in place. out doubles as scratch for each channel
+        np.right_shift(frame_bgr[..., 0], self.shift, out=index)
+        for channel in (1, 2):
+            np.left_shift(index, self.bits, out=index)
+            np.right_shift(frame_bgr[..., channel], self.shift, out=out)
+            np.bitwise_or(index, out, out=index)
+
+        # clip skips the bounds check buffer take would otherwise copy through. indices can't be out of range
+        return np.take(self.table.reshape(-1), index, out=out, mode="clip")
+
+
+# HSV value of the centre of every quantization bin, indexed [b, g, r]
+def quantized_hsv(bits):
+    levels = 1 << bits
+    shift = 8 - bits
+
+    # centre of each quantization bin so the table matches the colours it stands in for
+    centres = (np.arange(levels, dtype=np.uint16) << shift) + ((1 << shift) >> 1)
+    b, g, r = np.meshgrid(centres, centres, centres, indexing="ij")
+    bgr = np.stack((b, g, r), axis=-1).astype(np.uint8).reshape(levels, levels * levels, 3)
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV).reshape(levels, levels, levels, 3).astype(np.int16)
+
+
+def in_range(hsv, h, sens, min_s, max_s, min_v, max_v):
+    # opencv hue runs 0-179 and wraps, so measure the distance around the circle. reds near 0 and 179 match
+    h_dist = np.abs(hsv[..., 0] - h)
+    h_dist = np.minimum(h_dist, 180 - h_dist)
+
+    return (
+        (h_dist <= sens) &
+        (min_s <= hsv[..., 1]) & (hsv[..., 1] <= max_s) &
+        (min_v <= hsv[..., 2]) & (hsv[..., 2] <= max_v)
+    )
+
+
+# tables only change when a slider moves, so keep the last few around and rebuild on a new threshold set
+@functools.lru_cache(maxsize=8)
+def get_table(h, sens, min_s, max_s, min_v, max_v, bits=6):
+    return ColourTable(h, sens, min_s, max_s, min_v, max_v, bits)
+
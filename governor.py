@@ -0,0 +1,79 @@
+import time
+from collections import deque
+
+
+# steps quality down when frames take longer than the budget and back up once there is room again. levels is a
+# list of {knob: value} from best to cheapest and nothing outside it is ever used. the mean work time of the last
+# window frames has to stay over degrade_at * budget for degrade_after seconds before a step down, and under
+# restore_at * budget for restore_after seconds before a step up. the gap between the two and the waits stop it
+# flipping between levels. samples are thrown away after a change so the new level is judged on its own frames
+class QualityGovernor:
+    def __init__(self, levels, budget, window=30, degrade_at=1.0, restore_at=0.7, degrade_after=0.5, restore_after=3.0):
+        self.levels = levels
+        self.budget = budget
+        self.degrade_at = degrade_at
+        self.restore_at = restore_at
+        self.degrade_after = degrade_after
+        self.restore_after = restore_after
+
+        self.level = 0
+        self.samples = deque(maxlen=window)
+        self.over_since = None
+        self.under_since = None
+        self.skip_next = False
+
+    def __getitem__(self, knob):
+        return self.levels[self.level][knob]
+
+    # level index and every knob's current value
+    def state(self):
+        return {"level": self.level, **self.levels[self.level]}
+
+    # the next sample covers time spent outside the game, like a menu, and is ignored
+    def pause(self):
+        self.skip_next = True
+        self.over_since = None
+        self.under_since = None
+
+    # work_time is seconds spent on the last frame, not counting time waiting for the frame cap.
+    # returns True when the level changed
+    def update(self, work_time, now=None):
+        if self.skip_next:
+            self.skip_next = False
+            return False
+
+        if now is None:
+            now = time.perf_counter()
+
+        self.samples.append(work_time)
+        if len(self.samples) < self.samples.maxlen:
+            return False
+
+        load = sum(self.samples) / len(self.samples) / self.budget
+
+        if load > self.degrade_at and self.level < len(self.levels) - 1:
+            if self.over_since is None:
+                self.over_since = now
+            elif now - self.over_since >= self.degrade_after:
+                self.set_level(self.level + 1)
+                return True
+        else:
+            self.over_since = None
+
+        if load < self.restore_at and self.level > 0:
+            if self.under_since is None:
+                self.under_since = now
+            elif now - self.under_since >= self.restore_after:
+                self.set_level(self.level - 1)
+                return True
+        else:
+            self.under_since = None
+
+        return False
+
+    def set_level(self, level):
+        self.level = min(max(level, 0), len(self.levels) - 1)
+        self.samples.clear()
+        self.over_since = None
+        self.under_since = None
+        print("quality", self.state())
@@ -4,17 +4,102 @@ import pygame
 import sys
 import math
 import random
-from menu import Button, Slider
+from menu import Button, Slider, clamp, wait_events
+from capture import open_camera
+from recording import FrameRecorder
+from colour_table import get_table
+from segment import Segmenter, blobs_from_stats, empty_blobs
+from particles import ParticleSystem
+from assets import assets
+from settings import settings
+from music import MusicPlayer
+from preview import CameraPreview
+from simulation import FixedStep, lerp
+from trail import Trail
+from collision import SpatialGrid, sweep_hits, swipe_angle
+from tracker import BladeTracker, blob_centre
+from profiler import profiler
+from worker import VisionWorker
+from governor import QualityGovernor
+from motion import MotionGate
 import time
 
 KERNEL_SIZE = 25
+MIN_BLOB_AREA = 800
+
+# how Colour dilates its mask: "square", "separable" or "iterated". all give the same blobs at different speeds
+DILATION = "square"
+
+# fraction of the camera resolution that colour detection runs at. 1 is native, 0.5 and 0.25 are much cheaper
+DETECT_SCALE = 0.5
+
+# how many times a second the camera preview is refreshed. tracking runs at the camera's own rate
+PREVIEW_FPS = 30
+
+# half size of the search window around a tracked blade and how many seconds of velocity it is grown by
+ROI_MARGIN = 120
+ROI_LEAD = 0.07
+
+# delay between the scene and the capture timestamp (exposure, usb, driver) that can't be measured.
+# the blade is predicted this far past the newest frame on top of the measured processing time
+CAMERA_LATENCY = 0.03
 
 WIDTH = 600
 HEIGHT = 500
 
+# draw boxes around the detected blobs on the camera preview
+ANNOTATE_PREVIEW = True
+
+# camera index, video file or recording to play back. the first command line argument overrides it
+CAMERA_SOURCE = 0
+
+# feeds every frame of CAMERA_SOURCE to the game in order as fast as it runs instead of in real time, so two
+# versions can be compared on exactly the same frames of a recording. "every" after the source turns it on
+REPLAY_EVERY_FRAME = False
+
+# seconds to wait for the camera's first frame before giving up
+CAMERA_TIMEOUT = 20
+
+# runs detection in a separate process so it can't stall simulation and drawing. costs a frame copy and a little
+# latency handing frames over
+VISION_WORKER = False
+
+# classify pixels with a compiled ColourTable instead of cvtColor + inRange. opencv's path has been faster at every
+# resolution measured (python -m benchmarks.vision compares both) so this is off unless a machine shows otherwise
+COLOUR_TABLE = False
+
+# skips detection while nothing in view moves and only searches where something did while the blade is lost
+MOTION_GATE = True
+
+# (hue, name) of every blade colour being tracked. more than one switches to single pass segmentation
+TRACKED_COLOURS = [
+    (30, "yellow"),
+]
+
 TARGET_RAD = 15
 TIME_LIMIT = 60
 
+# the simulation runs in fixed steps of 1 / SIM_RATE seconds. frames are drawn at DISPLAY_FPS and tracking
+# runs whenever the camera delivers a frame, so none of the three depend on each other
+SIM_RATE = 120
+DISPLAY_FPS = 60
+
+# the game was tuned per frame on a 30 fps camera. speeds in pixels per frame are converted with this
+REFERENCE_FPS = 30
+GRAVITY = 0.5 * REFERENCE_FPS**2  # pixels per second squared
+TRAIL_SHRINK = 0.5 * REFERENCE_FPS  # trail radius lost per second
+
+# what the QualityGovernor steps through when frames run over budget, best first. the first level is the
+# normal game. scale is the detection scale, kernel the dilation size, particles the burst per slice and
+# trail_spacing the pixels between trail points
+QUALITY_LEVELS = [
+    {"scale": DETECT_SCALE, "kernel": KERNEL_SIZE, "preview_fps": PREVIEW_FPS, "particles": 300, "trail_spacing": 1.0},
+    {"scale": DETECT_SCALE, "kernel": KERNEL_SIZE, "preview_fps": 20, "particles": 200, "trail_spacing": 1.5},
+    {"scale": 0.4, "kernel": 21, "preview_fps": 15, "particles": 150, "trail_spacing": 2.0},
+    {"scale": 0.33, "kernel": 17, "preview_fps": 10, "particles": 100, "trail_spacing": 3.0},
+    {"scale": 0.25, "kernel": 13, "preview_fps": 5, "particles": 50, "trail_spacing": 4.0},
+]
+
 # music from https://www.fesliyanstudios.com/royalty-free-music/downloads-c/japanese-music/63
 # credit to Fesliyan Studios
 MUSIC_LIST = [
@@ -37,33 +122,152 @@ FRUIT_IMAGES = [
 ]
 
 
-# a class to isolate a given colour and apply effects to it
+# a class to isolate a given colour and apply effects to it.
+# one is kept per tracked colour for the whole game. kernels and every per frame buffer are made once and opencv
+# writes into them with dst=, so processing a frame allocates next to nothing. moving a slider changes the
+# thresholds in place and keeps the buffers. the searched window changes size from frame to frame so buffers only
+# ever grow and the start of them is used.
+# when a compiled ColourTable is given, frames are classified in BGR and the table holds the thresholds.
+# dilation is "square" (one size x size kernel), "separable" (a row pass then a column pass, the same mask) or
+# "iterated" (a 3x3 kernel repeated, which rounds the size up to odd)
 class Colour:
-    def __init__(self, h, sens, name, data_hsv, minimum_s=100, minimum_v=100, maximum_s=255, maximum_v=255):
-        self.mask = None
+    def __init__(self, h, sens, name, minimum_s=100, minimum_v=100, maximum_s=255, maximum_v=255, table=None, dilation="square"):
         self.name = name
         self.origin_h = h
         self.h = h
+        self.dilation = dilation
+
+        # offset is the top left corner of the last searched window in the full frame and scale is how much it
+        # was shrunk. kernel sizes and areas shrink with it
+        self.offset = (0, 0)
+        self.scale = 1
+        self.range = None
+        self.mask = None
 
-        # catches hue values that are too low
-        h_diff = self.h - sens
-        if h_diff < 0:
-            self.h -= h_diff
+        self.thresholds = None
+        self.set_thresholds(sens, minimum_s, maximum_s, minimum_v, maximum_v, table)
+
+        self.kernels = {}
+        self.buffers = {}
+
+    # changes what counts as the colour. nothing is rebuilt when the thresholds are the same as before
+    def set_thresholds(self, sens, min_s, max_s, min_v, max_v, table=None):
+        if self.thresholds == (sens, min_s, max_s, min_v, max_v, table):
+            return
+        self.thresholds = (sens, min_s, max_s, min_v, max_v, table)
+        self.table = table
+        h = self.h
 
         # isolate the colour
-        lower = np.array([self.h - sens, minimum_s, minimum_v], np.uint8)
-        upper = np.array([self.h + sens, maximum_s, maximum_v], np.uint8)
-        self.range = cv2.inRange(data_hsv, lower, upper)
+        self.lower = np.array([max(h - sens, 0), min_s, min_v], np.uint8)
+        self.upper = np.array([min(h + sens, 179), max_s, max_v], np.uint8)
+
+        # hue wraps around at 180 so reds near either end also need the other side of the circle
+        self.wrap = None
+        if h - sens < 0:
+            self.wrap = (np.array([h - sens + 180, min_s, min_v], np.uint8), np.array([179, max_s, max_v], np.uint8))
+        elif h + sens > 179:
+            self.wrap = (np.array([0, min_s, min_v], np.uint8), np.array([h + sens - 180, max_s, max_v], np.uint8))
+
+    # an (h, w, *channels) array over the start of the flat buffer called name, so it is always contiguous.
+    # the buffer is only reallocated when it is too small
+    def buffer(self, name, h, w, *channels, dtype=np.uint8):
+        shape = (h, w, *channels)
+        size = int(np.prod(shape))
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.size < size:
+            buffer = np.empty(size, dtype)
+            self.buffers[name] = buffer
+        return buffer[:size].reshape(shape)
+
+    def kernel(self, w, h):
+        kernel = self.kernels.get((w, h))
+        if kernel is None:
+            kernel = np.ones((h, w), dtype="uint8")
+            self.kernels[(w, h)] = kernel
+        return kernel
+
+    # runs the searched part of a frame through the whole pipeline. roi is an (x, y, w, h) window of the frame and
+    # scale shrinks it before segmentation. the dilated mask ends up in self.mask
+    def process(self, frame, roi=None, scale=1, kernel_size=KERNEL_SIZE):
+        with profiler.stage("hsv"):
+            data = self.convert(self.shrink(frame, roi, scale))
+
+        return self.process_converted(data, self.offset, self.scale, kernel_size)
+
+    # the rest of process for an image another Colour already shrunk and converted from the window at offset, so
+    # colours searching the same window share that work
+    def process_converted(self, data, offset, scale, kernel_size=KERNEL_SIZE):
+        self.offset = offset
+        self.scale = scale
+
+        with profiler.stage("mask"):
+            self.threshold(data)
+
+        with profiler.stage("dilate"):
+            self.dilate_colour(kernel_size)
+
+        return self
+
+    # cuts the window out of the frame and shrinks it. returns the image that will be searched
+    def shrink(self, frame, roi=None, scale=1):
+        if roi is None:
+            x, y = 0, 0
+            frame_roi = frame
+        else:
+            x, y, w, h = roi
+            frame_roi = frame[y:y + h, x:x + w]
+
+        self.offset = (x, y)
+        self.scale = scale
+        if scale == 1:
+            return frame_roi
+
+        # opencv sizes the output as round(w * scale). passing scale rather than the size keeps its exact sampling
+        h, w = frame_roi.shape[:2]
+        small = self.buffer("small", max(1, round(h * scale)), max(1, round(w * scale)), 3)
+        return cv2.resize(frame_roi, None, dst=small, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    # convert rgb to hsv. the table classifies BGR directly
+    def convert(self, image):
+        if self.table is not None:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=self.buffer("hsv", *image.shape[:2], 3))
+
+    # marks every pixel of the colour with 255 in self.range
+    def threshold(self, data):
+        h, w = data.shape[:2]
+        self.range = self.buffer("range", h, w)
+
+        if self.table is not None:
+            self.table.apply(data, out=self.range, index=self.buffer("index", h, w, dtype=np.intp))
+            return self.range
+
+        cv2.inRange(data, self.lower, self.upper, dst=self.range)
+        if self.wrap is not None:
+            wrapped = cv2.inRange(data, *self.wrap, dst=self.buffer("wrap", h, w))
+            cv2.bitwise_or(self.range, wrapped, dst=self.range)
+        return self.range
 
     # expands the borders of large patches in colour range. kills noise. based on size
     # https://docs.opencv.org/4.x/d9/d61/tutorial_py_morphological_ops.html - docs for morphological transformation
-    def dilate_colour(self, size, frame_data):
-        kernel = np.ones((size, size), dtype="uint8")
-        self.mask = cv2.dilate(self.range, kernel)
+    def dilate_colour(self, size):
+        size = max(1, round(size * self.scale))
+        h, w = self.range.shape
+        self.mask = self.buffer("mask", h, w)
+
+        if self.dilation == "separable":
+            rows = cv2.dilate(self.range, self.kernel(size, 1), dst=self.buffer("rows", h, w))
+            cv2.dilate(rows, self.kernel(1, size), dst=self.mask)
+        elif self.dilation == "iterated":
+            cv2.dilate(self.range, self.kernel(3, 3), dst=self.mask, iterations=size // 2)
+        else:
+            cv2.dilate(self.range, self.kernel(size, size), dst=self.mask)
 
-        return cv2.bitwise_and(frame_data, frame_data, mask=self.mask)
+        return self.mask
 
-    # defines the shape of found objects and draws rectangles representing the bounding box
+    # defines the shape of found objects and draws rectangles representing the bounding box.
+    # rects are in full frame pixels like the frame they are drawn on. game_scale maps them onto the play area
     def get_contour(self, frame_data):
         contours, hierarchy = cv2.findContours(self.mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
         colour = self.hsv_to_bgr((self.origin_h, 255, 255))
@@ -72,28 +276,57 @@ class Colour:
 
         for pic, contour in enumerate(contours):
             area = cv2.contourArea(contour)
-            if area > 800:
+            if area > MIN_BLOB_AREA * self.scale**2:
+                # map back from the detection image to full frame coordinates
                 x, y, w, h = cv2.boundingRect(contour)
+                x = round(x / self.scale) + self.offset[0]
+                y = round(y / self.scale) + self.offset[1]
+                w = round(w / self.scale)
+                h = round(h / self.scale)
                 rect_list.append(pygame.Rect(x, y, w, h))
 
-                frame_data = cv2.rectangle(
-                    frame_data,
-                    (x, y),
-                    (x + w, y + h),
-                    colour,
-                    2
-                )
-
-                cv2.putText(
-                    frame_data,
-                    f"{self.name} Colour",
-                    (x, y),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.0,
-                    colour
-                )
+        frame_data = self.annotate(frame_data, rect_list[1:], colour, self.name)
 
         return frame_data, rect_list
 
+    # finds the same patches as get_contour straight from a connected components pass. no contours are traced and
+    # nothing is drawn. returns Blobs of numpy arrays in full frame coordinates
+    def get_blobs(self):
+        # only the box around the marked pixels is labelled. on a mostly empty mask that is far cheaper than all of it
+        x, y, w, h = cv2.boundingRect(self.mask)
+        if w == 0:
+            return empty_blobs()
+
+        labels = self.buffer("labels", h, w, dtype=np.int32)
+        count, labels, stats, centroids = cv2.connectedComponentsWithStats(self.mask[y:y + h, x:x + w], labels, connectivity=8)
+        stats[:, 0] += x
+        stats[:, 1] += y
+        centroids += (x, y)
+        return blobs_from_stats(stats[1:], centroids[1:], MIN_BLOB_AREA * self.scale**2, self.scale, self.offset)
+
+    # draws a labelled box around every rect on the frame. rects can be pygame.Rects or rows of (x, y, w, h)
+    @staticmethod
+    def annotate(frame_data, rects, colour, name):
+        for x, y, w, h in rects:
+            x, y, w, h = int(x), int(y), int(w), int(h)
+            frame_data = cv2.rectangle(
+                frame_data,
+                (x, y),
+                (x + w, y + h),
+                colour,
+                2
+            )
+
+            cv2.putText(
+                frame_data,
+                f"{name} Colour",
+                (x, y),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0,
+                colour
+            )
+
+        return frame_data
+
     @staticmethod
     def hsv_to_bgr(hsv):
         try:
@@ -140,13 +373,16 @@ class Colour:
         return bgr[2], bgr[1], bgr[0]
 
 
+# velocities are in pixels per second
 class Target:
     def __init__(self, pos, rad, colour, img):
         self.l_pos = list(pos)
         self.r_pos = list(pos)
+        self.prev_l_pos = list(pos)  # positions before the last step. drawing interpolates from them
+        self.prev_r_pos = list(pos)
         self.rad = rad
         self.colour = colour
-        self.gravity = 0.5
+        self.gravity = GRAVITY
         self.cut = False
         self.l_v = 0
         self.r_v = 0
@@ -171,45 +407,32 @@ class Target:
     def activate_cut(self, angle):
         self.angle = angle
         self.cut = True
-        self.l_v = -random.random() * 5
-        self.r_v = random.random() * 5
-
-    def update(self):
-        self.y_v += self.gravity
-        self.incr_pos(-1, self.l_v, self.y_v)
-        self.incr_pos(1, self.r_v, self.y_v)
+        self.l_v = -random.random() * 5 * REFERENCE_FPS
+        self.r_v = random.random() * 5 * REFERENCE_FPS
+
+    # advances dt seconds
+    def update(self, dt):
+        self.prev_l_pos = self.l_pos.copy()
+        self.prev_r_pos = self.r_pos.copy()
+        self.y_v += self.gravity * dt
+        self.incr_pos(-1, self.l_v * dt, self.y_v * dt)
+        self.incr_pos(1, self.r_v * dt, self.y_v * dt)
+
+    # alpha is how far between the previous and current step to draw
+    def draw(self, surface, alpha=1):
+        l_x, l_y = lerp(self.prev_l_pos[0], self.l_pos[0], alpha), lerp(self.prev_l_pos[1], self.l_pos[1], alpha)
+        r_x, r_y = lerp(self.prev_r_pos[0], self.r_pos[0], alpha), lerp(self.prev_r_pos[1], self.r_pos[1], alpha)
 
-    def draw(self, surface):
         if self.cut:
-            bounds = pygame.Rect(self.l_pos[0] - self.rad, self.l_pos[1] - self.rad, self.rad, self.rad)
+            bounds = pygame.Rect(l_x - self.rad, l_y - self.rad, self.rad, self.rad)
             pygame.draw.arc(surface, self.colour, bounds, self.angle, self.angle + math.pi, self.rad)
-            bounds = pygame.Rect(self.r_pos[0] - self.rad, self.r_pos[1] - self.rad, self.rad, self.rad)
+            bounds = pygame.Rect(r_x - self.rad, r_y - self.rad, self.rad, self.rad)
             pygame.draw.arc(surface, self.colour, bounds, self.angle + math.pi, self.angle, self.rad)
         else:
-            surface.blit(self.img, (self.l_pos[0] - self.rad, self.l_pos[1] - self.rad))
+            surface.blit(self.img, (l_x - self.rad, l_y - self.rad))
             # pygame.draw.circle(surface, self.colour, self.l_pos, self.rad)
 
 
-class Particle:
-    def __init__(self, pos, strength, size, colour):
-        self.pos = pygame.math.Vector2(pos)
-        self.size = size
-        self.colour = colour
-        self.GRAV = 0.5
-        angle = random.random() * math.pi * 2
-        x = strength * math.cos(angle)
-        y = strength * -math.sin(angle)
-        self.v = pygame.math.Vector2(x, y)
-
-    def update(self):
-        self.v.y += self.GRAV
-        self.pos += self.v
-
-    def draw(self, surface):
-        rect = pygame.Rect(self.pos.x, self.pos.y, self.size, self.size)
-        pygame.draw.rect(surface, self.colour, rect)
-
-
 class Ball:
     def __init__(self, pos, r, colour):
         self.pos = pos
@@ -225,63 +448,61 @@ class Ball:
 
 
 # creates patterns for targets to travel through
-def create_patterns(width, height, framerate):
+def create_patterns(width, height):
     patterns = []
 
-    # all patterns are lists of tuples that follow (x_pos, y_vel)
+    # all patterns are lists of tuples that follow (x_pos, y_vel) with y_vel in pixels per second.
+    # launched at top_v a target rises height * 4/5 in one second. each step of the old per frame
+    # spacing is REFERENCE_FPS pixels per second
+    top_v = height * 4/5 + GRAVITY / 2
+    mid_v = height // 2 + GRAVITY / 2
+    step = REFERENCE_FPS
 
     # from top left to bottom right
     pat = []
-    top_v = (height * 4/5 + 0.25*framerate**2) / framerate
     for i in range(5):
-        pat.append(((width * (i+1)) // 6, top_v - i))
+        pat.append(((width * (i+1)) // 6, top_v - i * step))
     patterns.append(pat)
 
     # from bottom left to top right
     pat = []
-    top_v = (height * 4/5 + 0.25*framerate**2) / framerate
     for i in range(5):
-        pat.append(((width * (i + 1)) // 6, top_v - 4 + i))
+        pat.append(((width * (i + 1)) // 6, top_v + (i - 4) * step))
     patterns.append(pat)
 
     # row at top
     pat = []
-    top_v = (height * 4/5 + 0.25*framerate**2) / framerate
     for i in range(5):
         pat.append(((width * (i + 1)) // 6, top_v))
     patterns.append(pat)
 
     # row at middle
     pat = []
-    top_v = (height // 2 + 0.25*framerate**2) / framerate
     for i in range(5):
-        pat.append(((width * (i + 1)) // 6, top_v))
+        pat.append(((width * (i + 1)) // 6, mid_v))
     patterns.append(pat)
 
     # column at left
     pat = []
-    top_v = (height * 4/5 + 0.25*framerate**2) / framerate
     for i in range(5):
-        pat.append((width // 6, top_v - i))
+        pat.append((width // 6, top_v - i * step))
     patterns.append(pat)
 
     # column at right
     pat = []
-    top_v = (height * 4/5 + 0.25*framerate**2) / framerate
     for i in range(5):
-        pat.append(((width * 5) // 6, top_v - i))
+        pat.append(((width * 5) // 6, top_v - i * step))
     patterns.append(pat)
 
     # column at middle
     pat = []
-    top_v = (height * 4/5 + 0.25*framerate**2) / framerate
     for i in range(5):
-        pat.append((width // 2, top_v - i))
+        pat.append((width // 2, top_v - i * step))
     patterns.append(pat)
 
     # random
     pat = []
-    half_v = (height * 4/5 + 0.25*framerate**2) / (framerate * 2)
+    half_v = top_v / 2
     for i in range(5):
         pat.append((random.randint(width // 6, (width * 5) // 6), random.random() * half_v + math.sqrt(2)*half_v))
     patterns.append(pat)
@@ -289,121 +510,75 @@ def create_patterns(width, height, framerate):
     return patterns
 
 
-def choose_music(channel):
-    rand_track = random.randint(0, len(MUSIC_LIST) - 1)
-    track = pygame.mixer.Sound(MUSIC_LIST[rand_track])
-    channel.play(track)
+# runs the colour pipeline over a frame and returns the annotated frame and [colour, rect, rect...].
+# roi is an (x, y, w, h) window of the frame to search and scale shrinks it before segmentation.
+# rects are always in full frame coordinates. table is a compiled ColourTable that replaces cvtColor + inRange
+def detect_colour(frame, hue, name, sens, min_s, max_s, min_v, max_v, roi=None, scale=DETECT_SCALE, table=None, kernel_size=KERNEL_SIZE):
+    colour = mask_colour(frame, hue, name, sens, min_s, max_s, min_v, max_v, roi, scale, table, kernel_size)
+    return colour.get_contour(frame)
 
 
-# divides a line segment into n points from beginning to end pos
-def divide_line(x1, y1, x2, y2, n):
-    d_x = x2 - x1
-    d_y = y2 - y1
-    points = []
+# same as detect_colour but returns Blobs from the connected components backend and leaves the frame alone
+def detect_blobs(frame, hue, name, sens, min_s, max_s, min_v, max_v, roi=None, scale=DETECT_SCALE, table=None, kernel_size=KERNEL_SIZE):
+    colour = mask_colour(frame, hue, name, sens, min_s, max_s, min_v, max_v, roi, scale, table, kernel_size)
+    with profiler.stage("contours"):
+        return colour.get_blobs()
 
-    if d_x == 0 and d_y == 0:
-        return [(x1, y1)]
-    elif d_x == 0:
-        y = min(y1, y2)
-        while y < max(y1, y2):
-            points.append([x1, y])
-            y += math.fabs(d_y / n)
-        points.append((x1, max(y1, y2)))
-        return points
 
-    m = d_y / d_x
-    b = y1 - m * x1
+# finds the blobs of every tracked colour. rois is the search window of each colour, thresholds is
+# (sens, min_s, max_s, min_v, max_v). used in game and by the VisionWorker, so it has to stay a module level function
+def find_blobs(frame, rois, scale, kernel_size, thresholds, table=None, segmenter=None):
+    if segmenter is not None:
+        return segmenter.segment(frame, rois, scale, kernel_size)
+    hue, name = TRACKED_COLOURS[0]
+    return [detect_blobs(frame, hue, name, *thresholds, roi=rois[0], scale=scale, table=table, kernel_size=kernel_size)]
 
-    x = min(x1, x2)
-    while x < max(x1, x2):
-        points.append([x, m * x + b])
-        x += math.fabs(d_x / n)
-    points.append((max(x1, x2), m * max(x1, x2) + b))
 
-    return points
+# one Colour per tracked colour, made on first use and kept so its buffers and kernels last between frames
+colours = {}
 
 
-def get_setting(label):
-    with open("settings.txt", 'r') as f:
-        try:
-            for line in f.readlines():
-                line_text = line.split()
-                line_text[0] = line_text[0].strip(':')
-                if line_text[0] == label:
-                    return line_text[1]
-            else:
-                return None
-        except:
-            print("error reading file")
-            return None
+# the Colour tracking hue, set to the given thresholds. new thresholds update it in place
+def get_colour(hue, name, sens, min_s, max_s, min_v, max_v, table=None):
+    colour = colours.get((hue, name))
+    if colour is None:
+        colour = Colour(
+            hue, sens, name,
+            minimum_v=min_v, maximum_v=max_v, minimum_s=min_s, maximum_s=max_s,
+            table=table, dilation=DILATION
+        )
+        colours[(hue, name)] = colour
+    else:
+        colour.set_thresholds(sens, min_s, max_s, min_v, max_v, table)
+    return colour
 
 
-def change_setting(label, value):
-    data = []
-    with open("settings.txt", 'r') as f:
-        try:
-            data = f.readlines()
-        except:
-            print("error reading file")
+# thresholds and dilates the searched part of the frame. returns the Colour holding the mask
+def mask_colour(frame, hue, name, sens, min_s, max_s, min_v, max_v, roi=None, scale=DETECT_SCALE, table=None, kernel_size=KERNEL_SIZE):
+    colour = get_colour(hue, name, sens, min_s, max_s, min_v, max_v, table)
+    return colour.process(frame, roi, scale, kernel_size)
 
-    with open("settings.txt", 'w') as f:
-        try:
-            for i in range(len(data)):
-                line_text = data[i].split()
-                line_text[0] = line_text[0].strip(':')
-                if line_text[0] == label:
-                    data[i] = label + ': ' + str(value) + '\n'
-                    break
-            f.writelines(data)
-        except:
-            print("error reading file")
-
-
-# combines colliding rects in the list
-def merge_rects(rect_list):
-    copy_list = rect_list.copy()
-    collisions = []
-    kill_list = []
-
-    # print("total rects: ", len(copy_list))
-
-    # find groups of colliding rects
-    for i in range(len(copy_list)):
-        temp_collide = copy_list[i].collidelistall(copy_list)
-        temp_collide.sort()
-        if len(temp_collide) > 1:
-            if temp_collide not in collisions:
-                collisions.append(temp_collide)
-
-    # create a new rect from the group
-    for group in collisions:
-        x = min((copy_list[i].x for i in group))
-        y = min((copy_list[i].y for i in group))
-        merged_rect = pygame.Rect(
-            x,
-            y,
-            max((copy_list[i].x for i in group)) - x,
-            max((copy_list[i].y for i in group)) - y
-        )
-        copy_list.append(merged_rect)
 
-        # collect all indices to delete later
-        for i in group:
-            kill_list.append(i)
+# finds the part of the frame worth searching for a blob last seen at pos moving at v pixels per second.
+# the window is grown in the direction of travel so fast swipes stay inside it. returns (x, y, w, h) or None
+def tracking_window(pos, v, frame_w, frame_h):
+    x1 = int(clamp(pos[0] - ROI_MARGIN + min(v[0], 0) * ROI_LEAD, 0, frame_w))
+    x2 = int(clamp(pos[0] + ROI_MARGIN + max(v[0], 0) * ROI_LEAD, 0, frame_w))
+    y1 = int(clamp(pos[1] - ROI_MARGIN + min(v[1], 0) * ROI_LEAD, 0, frame_h))
+    y2 = int(clamp(pos[1] + ROI_MARGIN + max(v[1], 0) * ROI_LEAD, 0, frame_h))
 
-    kill_list = list(dict.fromkeys(kill_list))
-    kill_list.sort()
-    # print("dead rects: ", len(kill_list))
-    # delete merged rectangles from list from right to left to avoid issues with shifting indices
-    for i in range(len(kill_list) - 1, -1, -1):
-        copy_list.pop(kill_list[i])
+    if x2 - x1 <= 0 or y2 - y1 <= 0:
+        return None
+    return x1, y1, x2 - x1, y2 - y1
 
-    # print("final length: ", len(copy_list))
 
-    return copy_list
+# per axis factor from camera frame pixels to play area pixels. detection and tracking stay in frame pixels so
+# search windows line up with the frame, and only the blade that is drawn and swiped with is mapped to the game
+def game_scale(frame_w, frame_h):
+    return np.array([WIDTH / frame_w, HEIGHT / frame_h])
 
 
-def game_over(surface, sound_channel, score, high_score):
+def game_over(surface, music, score, high_score):
 
     win_width = surface.get_width()
     win_height = surface.get_height()
@@ -411,12 +586,9 @@ def game_over(surface, sound_channel, score, high_score):
     mouse_down = False
 
     # image Designed by Freepik
-    bg_img = pygame.image.load("Images//Title_bg.jpg")
-    bg_img = pygame.transform.scale(bg_img, (win_width, win_height))
+    bg_img = assets.get("Images//Title_bg.jpg", (win_width, win_height))
 
-    clock = pygame.time.Clock()
-
-    init_volume = int(get_setting("volume"))
+    init_volume = settings.get("volume")
 
     title_button = Button(
         win_width // 2 - 200,
@@ -457,8 +629,11 @@ def game_over(surface, sound_channel, score, high_score):
     if score > high_score:
         high_text.text = "New High Score: " + str(score)
 
+    # nothing on this screen moves, so it is only drawn when it first appears or the window is exposed
+    redraw = True
+
     while True:
-        events = pygame.event.get()
+        events = wait_events()
         for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -472,17 +647,12 @@ def game_over(surface, sound_channel, score, high_score):
             elif event.type == pygame.MOUSEBUTTONUP:
                 mouse_down = False
             elif event.type == pygame.USEREVENT:
-                choose_music(sound_channel)
-
-        surface.blit(bg_img, (0, 0))
+                music.on_end()
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
 
         title_button.update(mouse_down)
-        title_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
         play_button.update(mouse_down)
-        play_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
-
-        score_text.draw(surface, (255, 255, 255), (255, 255, 255), border_w=-1)
-        high_text.draw(surface, (255, 255, 255), (255, 255, 255), border_w=-1)
 
         if title_button.pressed:
             return False
@@ -490,14 +660,23 @@ def game_over(surface, sound_channel, score, high_score):
             return True
 
         # sets the volume. Value must be from 0.0-1.0 and self.value is from 0-100
-        sound_channel.set_volume(init_volume / 100)
+        music.set_volume(init_volume / 100)
+        music.update()
+
+        if redraw:
+            surface.blit(bg_img, (0, 0))
 
-        pygame.display.flip()
+            title_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
+            play_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
 
-        clock.tick(165)
+            score_text.draw(surface, (255, 255, 255), (255, 255, 255), border_w=-1)
+            high_text.draw(surface, (255, 255, 255), (255, 255, 255), border_w=-1)
 
+            pygame.display.flip()
+            redraw = False
 
-def pause_menu(surface, sound_channel):
+
+def pause_menu(surface, music):
 
     win_width = surface.get_width()
     win_height = surface.get_height()
@@ -505,17 +684,14 @@ def pause_menu(surface, sound_channel):
     mouse_down = False
 
     # image Designed by Freepik
-    bg_img = pygame.image.load("Images//Title_bg.jpg")
-    bg_img = pygame.transform.scale(bg_img, (win_width, win_height))
+    bg_img = assets.get("Images//Title_bg.jpg", (win_width, win_height))
 
-    clock = pygame.time.Clock()
-
-    init_volume = int(get_setting("volume"))
-    sens = int(get_setting("sens"))
-    min_v = int(get_setting("min_v"))
-    max_v = int(get_setting("max_v"))
-    min_s = int(get_setting("min_s"))
-    max_s = int(get_setting("max_s"))
+    init_volume = settings.get("volume")
+    sens = settings.get("sens")
+    min_v = settings.get("min_v")
+    max_v = settings.get("max_v")
+    min_s = settings.get("min_s")
+    max_s = settings.get("max_s")
 
     back_button = Button(
         win_width // 2 - 200,
@@ -534,35 +710,19 @@ def pause_menu(surface, sound_channel):
     min_s_slider = Slider("Minimum saturation", min_s, win_width // 2 - 300, win_height // 3 + 240, 600, 40, font_size=36, max_val=255)
     max_s_slider = Slider("Maximum saturation", max_s, win_width // 2 - 300, win_height // 3 + 300, 600, 40, font_size=36, max_val=255)
 
-    camera = cv2.VideoCapture(0)
-
-    while True:
-        # CV2 Process---------------------------------------------------------------------------------------------------
-        rects = []
-
-        # grabs the frame data
-        frame = camera.read()[1]
-        frame = cv2.flip(frame, 1)
-
-        # convert rgb to hsv
-        hsv_data = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # Set up lower and upper bounds for each desired colour
+    sliders = [v_slider, sens_slider, min_v_slider, max_v_slider, min_s_slider, max_s_slider]
 
-        yellow = Colour(30, sens, "yellow", hsv_data, minimum_v=min_v, maximum_v=max_v, minimum_s=min_s, maximum_s=max_s)  # min_v=130
-        yellow.dilate_colour(KERNEL_SIZE, frame)
+    camera = open_camera(CAMERA_SOURCE)
 
-        frame, temp_rects = yellow.get_contour(frame)
-        rects.append(temp_rects)
+    # only the camera preview changes by itself. everything else is drawn once and then only where a slider moved
+    redraw = True
+    preview = None
 
-        frame_rgb = frame.transpose([1, 0, 2])
-        frame_rgb = cv2.cvtColor(frame_rgb, cv2.COLOR_BGR2RGB)
-        colour_viewer = pygame.surfarray.make_surface(frame_rgb)
-
-        # cv2.imshow("Colour Detection Viewer", frame)
-        # End of CV2 Process--------------------------------------------------------------------------------------------
+    while True:
+        dirty_rects = []
 
-        events = pygame.event.get()
+        # wake up in time for the next camera frame, or sooner if there is input
+        events = wait_events(1000 // PREVIEW_FPS)
         for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -576,70 +736,91 @@ def pause_menu(surface, sound_channel):
             elif event.type == pygame.MOUSEBUTTONUP:
                 mouse_down = False
             elif event.type == pygame.USEREVENT:
-                choose_music(sound_channel)
-
-        surface.blit(bg_img, (0, 0))
+                music.on_end()
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
 
         back_button.update(mouse_down)
-        back_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
-
-        # update and draw all sliders. These should really be in a list
-        v_slider.update(mouse_down)
-        v_slider.draw(surface, (255, 255, 255))
-        sens_slider.update(mouse_down)
-        sens_slider.draw(surface, (255, 255, 255))
-        min_v_slider.update(mouse_down)
-        min_v_slider.draw(surface, (255, 255, 255))
-        max_v_slider.update(mouse_down)
-        max_v_slider.draw(surface, (255, 255, 255))
-        min_s_slider.update(mouse_down)
-        min_s_slider.draw(surface, (255, 255, 255))
-        max_s_slider.update(mouse_down)
-        max_s_slider.draw(surface, (255, 255, 255))
 
         if back_button.pressed:
+            camera.release()
             break
 
+        # update all sliders and redraw the ones that moved over a fresh piece of background
+        for slider in sliders:
+            old_value = slider.value
+            slider.update(mouse_down)
+            if slider.value != old_value and not redraw:
+                surface.blit(bg_img, slider.rect, slider.rect)
+                slider.draw(surface, (255, 255, 255))
+                dirty_rects.append(slider.rect)
+
         # sets the volume. Value must be from 0.0-1.0 and self.value is from 0-100
-        sound_channel.set_volume(v_slider.value / 100)
+        music.set_volume(v_slider.value / 100)
+        music.update()
         if v_slider.value != init_volume:
-            change_setting("volume", v_slider.value)
+            settings.set("volume", v_slider.value)
             init_volume = v_slider.value
 
         # sets the sensitivity. Value should be from 0-15 and self.value is from 0-15
         if sens_slider.value != sens:
-            change_setting("sens", sens_slider.value)
+            settings.set("sens", sens_slider.value)
             sens = sens_slider.value
 
         # sets the minimum value to detect. Value must be from 0-255 and self.value is from 0-255
         if min_v_slider.value != min_v:
-            change_setting("min_v", min_v_slider.value)
+            settings.set("min_v", min_v_slider.value)
             min_v = min_v_slider.value
 
         # sets the maximum value to detect. Value must be from 0-255 and self.value is from 0-255
         if max_v_slider.value != max_v:
-            change_setting("max_v", max_v_slider.value)
+            settings.set("max_v", max_v_slider.value)
             max_v = max_v_slider.value
 
         # sets the minimum value to detect. Value must be from 0-255 and self.value is from 0-255
         if min_s_slider.value != min_s:
-            change_setting("min_s", min_s_slider.value)
+            settings.set("min_s", min_s_slider.value)
             min_s = min_s_slider.value
 
         # sets the minimum value to detect. Value must be from 0-255 and self.value is from 0-255
         if max_s_slider.value != max_s:
-            change_setting("max_s", max_s_slider.value)
+            settings.set("max_s", max_s_slider.value)
             max_s = max_s_slider.value
 
-        colour_viewer = pygame.transform.scale(colour_viewer, (win_width//2 - 350, (win_width//2 - 350) * colour_viewer.get_height() / colour_viewer.get_width()))
-        surface.blit(colour_viewer, (0, 0))
+        if redraw:
+            surface.blit(bg_img, (0, 0))
+            back_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
+            for slider in sliders:
+                slider.draw(surface, (255, 255, 255))
 
-        pygame.display.flip()
+        # CV2 Process---------------------------------------------------------------------------------------------------
+        if camera.has_new():
+            # grabs the newest frame from the capture thread
+            frame = camera.read()[1]
+            frame = cv2.flip(frame, 1)
+
+            # Set up lower and upper bounds for each desired colour
+            # the table is only rebuilt when a slider has changed the thresholds
+            table = get_table(30, sens, min_s, max_s, min_v, max_v) if COLOUR_TABLE else None
+            frame = detect_colour(frame, 30, "yellow", sens, min_s, max_s, min_v, max_v, table=table)[0]  # min_v=130
+
+            if preview is None:
+                preview = CameraPreview((win_width//2 - 350, (win_width//2 - 350) * frame.shape[0] / frame.shape[1]))
+            preview_rect = surface.blit(preview.update(frame), (0, 0))
+            dirty_rects.append(preview_rect)
+        elif redraw and preview is not None:
+            # the background was just drawn over the last preview
+            surface.blit(preview.surface, (0, 0))
+        # End of CV2 Process--------------------------------------------------------------------------------------------
 
-        clock.tick(165)
+        if redraw:
+            pygame.display.flip()
+            redraw = False
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
 
 
-def title_screen(surface, sound_channel):
+def title_screen(surface, music):
     samurai_font = pygame.font.Font("Midorima.ttf", 256)
 
     win_width = surface.get_width()
@@ -648,12 +829,9 @@ def title_screen(surface, sound_channel):
     mouse_down = False
 
     # image Designed by Freepik
-    bg_img = pygame.image.load("Images//Title_bg.jpg")
-    bg_img = pygame.transform.scale(bg_img, (win_width, win_height))
+    bg_img = assets.get("Images//Title_bg.jpg", (win_width, win_height))
 
-    clock = pygame.time.Clock()
-
-    init_volume = int(get_setting("volume"))
+    init_volume = settings.get("volume")
 
     play_button = Button(
         win_width // 2 - 200,
@@ -683,8 +861,12 @@ def title_screen(surface, sound_channel):
         font_size=72
     )
 
+    # nothing on this screen moves, so it is only drawn when it first appears, after the settings menu or when
+    # the window is exposed
+    redraw = True
+
     while True:
-        events = pygame.event.get()
+        events = wait_events()
         for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -698,22 +880,14 @@ def title_screen(surface, sound_channel):
             elif event.type == pygame.MOUSEBUTTONUP:
                 mouse_down = False
             elif event.type == pygame.USEREVENT:
-                choose_music(sound_channel)
-                sound_channel.set_volume(init_volume)
-
-        # screen.fill((0, 0, 0))
-        surface.blit(bg_img, (0, 0))
-
-        w, h = samurai_font.size("Slice Master")
-        text_surface = samurai_font.render("Slice Master", True, (0, 0, 0))
-        surface.blit(text_surface, (win_width // 2 - w // 2, 0))
+                music.on_end()
+                music.set_volume(init_volume)
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
 
         play_button.update(mouse_down)
-        play_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
         settings_button.update(mouse_down)
-        settings_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
         quit_button.update(mouse_down)
-        quit_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
 
         if play_button.pressed:
             mouse_down = False
@@ -721,17 +895,31 @@ def title_screen(surface, sound_channel):
 
         if settings_button.pressed:
             mouse_down = False
-            pause_menu(surface, sound_channel)
-            init_volume = int(get_setting("volume"))
+            pause_menu(surface, music)
+            init_volume = settings.get("volume")
+            redraw = True
 
         if quit_button.pressed:
             pygame.quit()
             sys.exit()
 
-        sound_channel.set_volume(init_volume / 100)
+        music.set_volume(init_volume / 100)
+        music.update()
+
+        if redraw:
+            # screen.fill((0, 0, 0))
+            surface.blit(bg_img, (0, 0))
 
-        pygame.display.flip()
-        clock.tick(165)
+            w, h = samurai_font.size("Slice Master")
+            text_surface = samurai_font.render("Slice Master", True, (0, 0, 0))
+            surface.blit(text_surface, (win_width // 2 - w // 2, 0))
+
+            play_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
+            settings_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
+            quit_button.draw(surface, (255, 255, 255), (255, 255, 255), 10, 3)
+
+            pygame.display.flip()
+            redraw = False
 
 
 def main():
@@ -742,7 +930,7 @@ def main():
 
     font = pygame.font.Font(None, 72)
     score = 0
-    high_score = int(get_setting("high_score"))
+    high_score = settings.get("high_score")
 
     res_info = pygame.display.Info()
     win_width = res_info.current_w
@@ -753,34 +941,56 @@ def main():
 
     pygame.display.set_caption("Slice Master")
 
+    # decode, scale and convert every image once up front
+    assets.preload([("Images//Title_bg.jpg", (win_width, win_height), False)])
+    assets.preload([(f"Images//BG_{i}.jpg", (WIDTH, HEIGHT), False) for i in range(1, 5)])
+    assets.preload([(src, (TARGET_RAD*2, TARGET_RAD*2), True) for src, colour in FRUIT_IMAGES])
+    assets.report()
+
+    # only spawn fruit whose image actually loaded
+    fruits = [(src, colour) for src, colour in FRUIT_IMAGES if assets.get(src, (TARGET_RAD*2, TARGET_RAD*2), alpha=True)]
+
     clock = pygame.time.Clock()
 
-    balls = [[]]
     avg_ball = []
     old_pos = []
-    for i in balls:
+    search_roi = []  # window to search for each colour. None means the blade was lost and the full frame is searched
+    for colour in TRACKED_COLOURS:
         avg_ball.append(Ball((WIDTH // 2, HEIGHT // 2), 8, (255, 0, 0)))
         old_pos.append((WIDTH // 2, HEIGHT // 2))
+        search_roi.append(None)
     # ball1 = Ball((WIDTH // 2, HEIGHT // 2), 8, (255, 0, 0))
 
-    # only can queue one after initial. FIX THIS
-    channel = pygame.mixer.Channel(0)
-    choose_music(channel)
-    channel.set_endevent(pygame.USEREVENT)
+    # streams shuffled tracks and posts USEREVENT whenever one ends
+    music = MusicPlayer(MUSIC_LIST)
+    music.play()
 
     targets = []
-    particles = []
+    particles = ParticleSystem(gravity=GRAVITY)
 
-    trail = []
+    trail = Trail()
+    grid = SpatialGrid()
 
-    title_screen(window, channel)
+    title_screen(window, music)
 
-    init_volume = int(get_setting("volume"))
-    sens = int(get_setting("sens"))
-    min_v = int(get_setting("min_v"))
-    max_v = int(get_setting("max_v"))
-    min_s = int(get_setting("min_s"))
-    max_s = int(get_setting("max_s"))
+    init_volume = settings.get("volume")
+    sens = settings.get("sens")
+    min_v = settings.get("min_v")
+    max_v = settings.get("max_v")
+    min_s = settings.get("min_s")
+    max_s = settings.get("max_s")
+
+    # compile the colour thresholds once. they can't change during a game
+    hue, name = TRACKED_COLOURS[0]
+    table = get_table(hue, sens, min_s, max_s, min_v, max_v) if COLOUR_TABLE else None
+
+    # several players share the frame's conversion wherever they are searched for in the same window
+    segmenter = None
+    if len(TRACKED_COLOURS) > 1:
+        segmenter = Segmenter([
+            get_colour(hue, name, sens, min_s, max_s, min_v, max_v, get_table(hue, sens, min_s, max_s, min_v, max_v) if COLOUR_TABLE else None)
+            for hue, name in TRACKED_COLOURS
+        ])
 
     # Run loading screen before attempting to load camera
     screen.fill((0, 0, 0))
@@ -789,56 +999,117 @@ def main():
     window.blit(screen, (win_width//2 - WIDTH//2, win_height//2 - HEIGHT//2))
     pygame.display.flip()
 
-    # creates an object that holds default device camera values
-    camera = cv2.VideoCapture(0)
+    # opens the camera (or replays a recording) and starts reading it on a background thread
+    camera = open_camera(CAMERA_SOURCE, REPLAY_EVERY_FRAME)
 
-    bg_img = pygame.image.load("Images//BG_4.jpg")
-    bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
-    fruit_img = pygame.image.load("Images//Pomegranate.webp")
-    fruit_img = pygame.transform.scale(fruit_img, (30, 30))
+    # F5 records the raw camera frames so detection changes can be compared on the same input
+    recorder = None
+
+    bg_img = assets.get("Images//BG_4.jpg", (WIDTH, HEIGHT))
 
     # image Designed by Freepik
-    win_bg_img = pygame.image.load("Images//Title_bg.jpg")
-    win_bg_img = pygame.transform.scale(win_bg_img, (win_width, win_height))
+    win_bg_img = assets.get("Images//Title_bg.jpg", (win_width, win_height))
 
     start_time = time.time()
 
-    framerate = camera.get(cv2.CAP_PROP_FPS)
-    framecount = 0
-    next_target_frame = framerate * random.randint(1, 3)
+    # waves are timed in simulated seconds
+    sim = FixedStep(SIM_RATE)
+    next_target_time = random.randint(1, 3)
 
-    patterns = create_patterns(WIDTH, HEIGHT, framerate)
+    patterns = create_patterns(WIDTH, HEIGHT)
 
-    while True:
+    # wait for the first frame so the preview knows the camera's shape. some webcams take several seconds to
+    # deliver one, so only give up once the camera failed to open or stayed silent for CAMERA_TIMEOUT
+    wait_start = time.perf_counter()
+    ret, frame = camera.read()[:2]
+    while not ret:
+        if not camera.isOpened() or time.perf_counter() - wait_start > CAMERA_TIMEOUT:
+            camera.release()
+            pygame.quit()
+            sys.exit(f"no frames from camera {CAMERA_SOURCE!r}. check it is connected and not in use")
+        # keeps the window responding while the camera starts
+        pygame.event.pump()
+        ret, frame = camera.read()[:2]
+    panel_w = win_width - WIDTH * (win_height / HEIGHT)
+    preview = CameraPreview((panel_w, panel_w * frame.shape[0] / frame.shape[1]), PREVIEW_FPS)
 
-        # CV2 Process---------------------------------------------------------------------------------------------------
-        rects = []
+    # blades are tracked in camera pixels, starting from the middle of the frame
+    to_game = game_scale(frame.shape[1], frame.shape[0])
+    trackers = [BladeTracker((frame.shape[1] // 2, frame.shape[0] // 2)) for colour in TRACKED_COLOURS]
 
-        # grabs the frame data
-        frame = camera.read()[1]
-        frame = cv2.flip(frame, 1)
+    # frames have to fit in the display frame rate. detection, effects and the preview are cut back when they don't
+    governor = QualityGovernor(QUALITY_LEVELS, 1 / DISPLAY_FPS)
 
-        # convert rgb to hsv
-        hsv_data = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    thresholds = (sens, min_s, max_s, min_v, max_v)
+    worker = None
+    if VISION_WORKER:
+        worker = VisionWorker(frame.shape, find_blobs, thresholds, table, segmenter)
 
-        # Set up lower and upper bounds for each desired colour
-        yellow = Colour(30, sens, "yellow", hsv_data, minimum_v=min_v, maximum_v=max_v, minimum_s=min_s, maximum_s=max_s)  # min_v=130
-        yellow.dilate_colour(KERNEL_SIZE, frame)
+    gate = MotionGate() if MOTION_GATE else None
 
-        # finds the location of all patches of the given colours. Stores in a list of rectangles
-        frame, temp_rects = yellow.get_contour(frame)
-        rects.append(temp_rects)
+    # blobs found most recently and the capture time of the frame they came from
+    blobs = [empty_blobs() for colour in TRACKED_COLOURS]
+    blob_time = 0.0
+
+    while True:
+        profiler.begin_frame()
 
-        frame_rgb = frame.transpose([1, 0, 2])
-        frame_rgb = cv2.cvtColor(frame_rgb, cv2.COLOR_BGR2RGB)
-        colour_viewer = pygame.surfarray.make_surface(frame_rgb)
+        # CV2 Process---------------------------------------------------------------------------------------------------
+
+        # tracking runs at the camera's rate. frames are drawn more often than it delivers them
+        detected = False
+        if camera.has_new():
+            # grabs the newest frame from the capture thread. stale frames are dropped, not queued
+            with profiler.stage("capture"):
+                frame, frame_time = camera.read()[1:]
+                if recorder is not None:
+                    recorder.write(frame, frame_time)
+                frame = cv2.flip(frame, 1)
+
+            with profiler.stage("motion"):
+                changed = gate.check(frame) if gate is not None else (0, 0, frame.shape[1], frame.shape[0])
+
+            if changed is None:
+                # nothing moved so the last blobs still hold for this frame
+                blob_time = frame_time
+                detected = True
+            else:
+                # only the window around the tracked blade is processed. once it was lost, whatever changed is
+                rois = [changed if roi is None else roi for roi in search_roi]
+                if worker is None:
+                    blobs = find_blobs(frame, rois, governor["scale"], governor["kernel"], thresholds, table, segmenter)
+                    blob_time = frame_time
+                    detected = True
+                else:
+                    worker.submit(frame, frame_time, rois, governor["scale"], governor["kernel"])
+
+            # the preview fills the side panel and only refreshes at PREVIEW_FPS
+            if preview.due():
+                with profiler.stage("render"):
+                    # drawing the boxes is only for the preview and can be turned off
+                    if ANNOTATE_PREVIEW:
+                        for (hue, name), found in zip(TRACKED_COLOURS, blobs):
+                            frame = Colour.annotate(frame, found.boxes, Colour.hsv_to_bgr((hue, 255, 255)), name)
+                    preview.update(frame)
+
+        # results from the worker arrive a little after their frame. the boxes on the preview may be one frame late
+        if worker is not None:
+            result = worker.poll()
+            if result is not None:
+                blob_time, blobs = result[:2]
+                detected = True
 
         # cv2.imshow("Colour Detection Viewer", frame)
         # End of CV2 Process--------------------------------------------------------------------------------------------
 
         # Start of Pygame Process---------------------------------------------------------------------------------------
-        framecount += 1
-        clock.tick(framerate)
+        # replaying every frame isn't held back to the display rate
+        clock.tick(0 if REPLAY_EVERY_FRAME else DISPLAY_FPS)
+
+        # trade detail for speed when frames run over budget. raw time leaves out the wait for the frame cap
+        if governor.update(clock.get_rawtime() / 1000):
+            preview.set_fps(governor["preview_fps"])
+            trail.spacing = governor["trail_spacing"]
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -853,100 +1124,106 @@ def main():
                     cv2.destroyAllWindows()
                     sys.exit()
                 if event.key == pygame.K_SPACE:
-                    bg_img = pygame.image.load(f"Images//BG_{random.randint(1, 4)}.jpg")
-                    bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+                    bg_img = assets.get(f"Images//BG_{random.randint(1, 4)}.jpg", (WIDTH, HEIGHT))
+                if event.key == pygame.K_F3:
+                    profiler.toggle()
+                if event.key == pygame.K_F5:
+                    if recorder is None:
+                        recorder = FrameRecorder(time.strftime("recording_%Y%m%d_%H%M%S.rec"))
+                    else:
+                        recorder.close()
+                        recorder = None
             elif event.type == pygame.USEREVENT:
-                choose_music(channel)
-                channel.set_volume(init_volume / 100)
+                music.on_end()
+                music.set_volume(init_volume / 100)
 
-        # screen.fill((0, 0, 0))
-        screen.blit(bg_img, (0, 0))
+        # queues the next track once it has been prefetched
+        music.update()
 
-        for i in range(len(rects)):
-            colour = rects[i][0]
-            merged_rects = merge_rects(rects[i][1:])
-            for rect in merged_rects:
-                balls[i].append(Ball(rect.center, 8, Colour.bgr_to_rgb(colour)))
+        # blade tracking. the filters only get a measurement when the camera delivered a new frame
+        if detected:
+            with profiler.stage("merge"):
+                for i in range(len(trackers)):
+                    trackers[i].update(blob_centre(blobs[i]), blob_time)
 
-        for target in targets:
-            target.update()
-            target.draw(screen)
-
-        for piece in particles:
-            piece.update()
-            piece.draw(screen)
-
-        connections = []
-        for i in range(len(balls)):
-            avg = list(avg_ball[i].pos)
-            for ball in balls[i]:
-                avg[0] += (ball.x - avg[0]) * math.sqrt(ball.rad) / 16
-                avg[1] += (ball.y - avg[1]) * math.sqrt(ball.rad) / 16
-                ball.update()
-                # ball.draw(screen)
-            avg_ball[i] = Ball(avg, 8, (0, 0, 255))
-            connections.append(avg)
-            avg_ball[i].draw(screen)
+                    # keep tracking around the blade while it is found. fall back to a full frame search once lost
+                    if len(blobs[i].areas) > 0:
+                        search_roi[i] = tracking_window(trackers[i].pos, trackers[i].vel, frame.shape[1], frame.shape[0])
+                    else:
+                        search_roi[i] = None
 
+        profiler.start("sim")
+
+        # swipes are tested against every uncut target near them
+        uncut = [target for target in targets if not target.cut]
+        centres = np.array([target.l_pos for target in uncut], float).reshape(-1, 2)
+        grid.build(centres, TARGET_RAD)
+
+        # the blade is drawn where it is predicted to be now, not where the camera last saw it
+        now = time.perf_counter() + CAMERA_LATENCY
         for i in range(len(avg_ball)):
-            ball_v = (avg_ball[i].pos[0] - old_pos[i][0]), (avg_ball[i].pos[1] - old_pos[i][1])
-            ball_speed = math.sqrt(ball_v[0]**2 + ball_v[1]**2)
-            points = divide_line(old_pos[i][0], old_pos[i][1], avg_ball[i].pos[0], avg_ball[i].pos[1], ball_speed)
+            avg_ball[i] = Ball(tuple(trackers[i].predict(now) * to_game), 8, (0, 0, 255))
+            trail.add_line(old_pos[i][0], old_pos[i][1], avg_ball[i].pos[0], avg_ball[i].pos[1])
 
-            for point in points:
-                trail.append(Ball(point, 8, (255, 240, 0)))
+            for hit in sweep_hits(old_pos[i], avg_ball[i].pos, avg_ball[i].rad, centres, TARGET_RAD, grid):
+                target = uncut[hit.index]
+                if not target.cut:
+                    target.activate_cut(swipe_angle(*(trackers[i].vel * to_game)))
+                    score += 1
+                    particles.emit(target.l_pos, governor["particles"], 5 * REFERENCE_FPS, target.colour)
 
             old_pos[i] = avg_ball[i].pos
 
+        # simulation. runs as many fixed steps as real time has passed
+        for dt in sim.steps():
             for target in targets:
-                if not target.cut:
-                    if math.sqrt((avg_ball[i].pos[0] - target.l_pos[0])**2 + (avg_ball[i].pos[1] - target.l_pos[1])**2) < avg_ball[i].rad + TARGET_RAD:
-                        if ball_v[0] == 0:
-                            angle = math.pi / 2
-                        else:
-                            angle = math.atan(-ball_v[1] / ball_v[0])
-                        target.activate_cut(angle)
-                        score += 1
-                        for j in range(300):
-                            particles.append(Particle(target.l_pos, random.random() * 5, 3, target.colour))
-                        # target = Target((random.randint(0, WIDTH), random.randint(0, HEIGHT)), 20, (255, 0, 0))
+                target.update(dt)
 
-        # pygame.draw.line(screen, (255, 255, 255), tuple(connections[0]), tuple(connections[1]), 8)
-
-        for ball in trail:
-            ball.update()
-            ball.draw(screen)
+            particles.update(dt)
 
-        for i in range(len(trail) - 1, -1, -1):
-            if trail[i].rad <= 0:
-                trail.pop(i)
+            trail.update(TRAIL_SHRINK * dt)
 
-        for ball_type in balls:
-            for i in range(len(ball_type) - 1, -1, -1):
-                if ball_type[i].rad <= 0:
-                    ball_type.pop(i)
+            if sim.time >= next_target_time:
+                pattern = patterns[random.randint(0, len(patterns) - 1)]
+                src, colour = fruits[random.randint(0, len(fruits) - 1)]
+                img = assets.get(src, (TARGET_RAD*2, TARGET_RAD*2), alpha=True)
+                for line in pattern:
+                    target = Target((line[0], HEIGHT + 4), TARGET_RAD, colour, img)
+                    target.y_v = -line[1]
+                    rand_num = (random.random()*2 - 1) * REFERENCE_FPS
+                    target.l_v = rand_num
+                    target.r_v = rand_num
+                    targets.append(target)
+                next_target_time = sim.time + random.randint(1, 2)
 
-        for i in range(len(particles) - 1, -1, -1):
-            if particles[i].pos.y > HEIGHT:
-                particles.pop(i)
+        particles.cull(HEIGHT)
 
+        # waves spawn below the screen, so only targets already falling back down are removed. one spawned on
+        # the last step of a frame hasn't moved up yet
         for i in range(len(targets) - 1, -1, -1):
-            if targets[i].l_pos[1] > HEIGHT and targets[i].r_pos[1] > HEIGHT:
+            if targets[i].y_v > 0 and targets[i].l_pos[1] > HEIGHT and targets[i].r_pos[1] > HEIGHT:
                 targets.pop(i)
 
-        if framecount >= next_target_frame:
-            pattern = patterns[random.randint(0, len(patterns) - 1)]
-            src, colour = FRUIT_IMAGES[random.randint(0, len(FRUIT_IMAGES) - 1)]
-            img = pygame.image.load(src)
-            img = pygame.transform.scale(img, (TARGET_RAD*2, TARGET_RAD*2))
-            for line in pattern:
-                target = Target((line[0], HEIGHT + 4), TARGET_RAD, colour, img)
-                target.y_v = -line[1]
-                rand_num = random.random()*2 - 1
-                target.l_v = rand_num
-                target.r_v = rand_num
-                targets.append(target)
-            next_target_frame = framecount + framerate * random.randint(1, 2)
+        profiler.stop("sim")
+        profiler.start("render")
+
+        # screen.fill((0, 0, 0))
+        screen.blit(bg_img, (0, 0))
+
+        # targets are drawn between their last two steps so motion stays smooth at any display rate
+        for target in targets:
+            target.draw(screen, sim.alpha)
+
+        particles.draw(screen)
+
+        for ball in avg_ball:
+            ball.draw(screen)
+
+        # pygame.draw.line(screen, (255, 255, 255), tuple(connections[0]), tuple(connections[1]), 8)
+
+        trail.draw(screen)
+
+        profiler.stop("render")
 
         # for i in range(len(targets)):
         #     if targets[i].l_pos[1] > HEIGHT and targets[i].r_pos[1] > HEIGHT:
@@ -960,27 +1237,35 @@ def main():
         elapsed_time = int(start_time - time.time() + TIME_LIMIT)
         if elapsed_time <= 0:
             if score > high_score:
-                change_setting("high_score", score)
-            play_again = game_over(window, channel, score, high_score)
+                settings.set("high_score", score)
+            play_again = game_over(window, music, score, high_score)
+
+            # time spent in the menu isn't simulated or profiled
+            sim.pause()
+            profiler.begin_frame()
+            governor.pause()
             if play_again:
                 score = 0
-                high_score = int(get_setting("high_score"))
+                high_score = settings.get("high_score")
                 start_time = time.time()
-                framecount = 0
-                next_target_frame = 3*framerate
+                next_target_time = sim.time + 3
                 targets = []
             else:
+                camera.release()
                 break
 
-        window.blit(win_bg_img, (0, 0))
+        with profiler.stage("render"):
+            window.blit(win_bg_img, (0, 0))
 
         new_w = WIDTH * (win_height / HEIGHT)
-        screen_surface = pygame.transform.scale(screen, (new_w, win_height))
-        window.blit(screen_surface, (win_width - new_w, 0))
+        with profiler.stage("scale"):
+            screen_surface = pygame.transform.scale(screen, (new_w, win_height))
+            window.blit(screen_surface, (win_width - new_w, 0))
+
+        profiler.start("render")
 
-        new_h = (win_width - new_w) * colour_viewer.get_height() / colour_viewer.get_width()
-        colour_viewer = pygame.transform.scale(colour_viewer, (win_width - new_w, new_h))
-        window.blit(colour_viewer, (0, 0))
+        new_h = preview.size[1]
+        window.blit(preview.surface, (0, 0))
 
         text = font.render("Score: " + str(score), True, (255, 255, 255))
         window.blit(text, ((win_width - new_w) // 10, new_h + win_height // 20))
@@ -991,7 +1276,16 @@ def main():
         text = font.render("High Score: " + str(high_score), True, (255, 255, 255))
         window.blit(text, ((win_width - new_w) // 10, new_h + win_height // 20 + 180))
 
-        pygame.display.flip()
+        # F3 shows stage timings under the scores, with how many camera frames the loop was too slow to take
+        profiler.note("dropped", camera.dropped)
+        profiler.draw(window, ((win_width - new_w) // 10, new_h + win_height // 20 + 250))
+
+        profiler.stop("render")
+
+        with profiler.stage("flip"):
+            pygame.display.flip()
+
+        profiler.end_frame()
 
         # End of Pygame Process-----------------------------------------------------------------------------------------
 
@@ -999,4 +1293,8 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        CAMERA_SOURCE = sys.argv[1]
+    if len(sys.argv) > 2 and sys.argv[2] == "every":
+        REPLAY_EVERY_FRAME = True
     main()
@@ -1,9 +1,8 @@
-import random
-
 import pygame
 import sys
 import math
-import time
+
+from music import MusicPlayer
 
 
 WIDTH = 512
@@ -30,6 +29,10 @@ class Button:
         self.text = text
         self.font = pygame.font.Font(font_path, font_size)
 
+        # wrapped and rendered lines from the last draw and what they were made from
+        self.lines = []
+        self.layout_key = None
+
     def update(self, mouse_down):
 
         mousepos = pygame.mouse.get_pos()
@@ -41,9 +44,26 @@ class Button:
         )
 
     def draw(self, surface, border_colour, font_colour, rounded_rad=-1, border_w=1, centred=True):
+        offset = rounded_rad + self.hitbox.w // 30
+
+        for i, (text_surface, w, h) in enumerate(self.layout(font_colour, offset)):
+            if centred:
+                dest = self.hitbox.centerx - w // 2, self.hitbox.y + offset // 4 + h * i
+                surface.blit(text_surface, dest)
+            else:  # left aligned
+                dest = self.hitbox.x + offset, self.hitbox.y + offset // 2 + h * i
+                surface.blit(text_surface, dest)
+
+        pygame.draw.rect(surface, border_colour, self.hitbox, width=border_w, border_radius=rounded_rad)
+
+    # wraps the text to the hitbox and renders each line. only redone when the text, colour or size changes
+    def layout(self, font_colour, offset):
+        key = (self.text, tuple(font_colour), self.hitbox.w, offset)
+        if key == self.layout_key:
+            return self.lines
+
         words = self.text.split()
         lines = []
-        offset = rounded_rad + self.hitbox.w // 30
 
         # deal with long word still
         total_width = 0
@@ -59,18 +79,13 @@ class Button:
                 sentence += word + ' '
         lines.append(sentence)
 
-        for i in range(len(lines)):
-            text_surface = self.font.render(lines[i], 1, font_colour)
-            w, h = self.font.size(lines[i])
+        self.lines = []
+        for line in lines:
+            w, h = self.font.size(line)
+            self.lines.append((self.font.render(line, 1, font_colour), w, h))
+        self.layout_key = key
 
-            if centred:
-                dest = self.hitbox.centerx - w // 2, self.hitbox.y + offset // 4 + h * i
-                surface.blit(text_surface, dest)
-            else:  # left aligned
-                dest = self.hitbox.x + offset, self.hitbox.y + offset // 2 + h * i
-                surface.blit(text_surface, dest)
-
-        pygame.draw.rect(surface, border_colour, self.hitbox, width=border_w, border_radius=rounded_rad)
+        return self.lines
 
 
 class Slider:
@@ -87,6 +102,12 @@ class Slider:
 
         self.slider_range = (self.rect.x + self.text_w + self.offset, self.rect.right - self.offset - self.num_w)
 
+        # rendered label and value text, kept until the text or colour changes
+        self.label_surface = None
+        self.label_key = None
+        self.value_surface = None
+        self.value_key = None
+
     def update(self, mouse_down):
         mouse_x, mouse_y = pygame.mouse.get_pos()
 
@@ -100,7 +121,11 @@ class Slider:
     def draw(self, surface, colour):
 
         # draw label
-        text_surface = self.font.render(self.label, 1, colour)
+        key = (self.label, tuple(colour))
+        if key != self.label_key:
+            self.label_surface = self.font.render(self.label, 1, colour)
+            self.label_key = key
+        text_surface = self.label_surface
         dest = (self.rect.x, self.rect.centery - self.text_h // 2)
         surface.blit(text_surface, dest)
 
@@ -124,11 +149,33 @@ class Slider:
         pygame.draw.rect(surface, colour, vert_bar)
 
         # draw value
-        text_surface = self.font.render(str(self.value), 1, colour)
+        key = (self.value, tuple(colour))
+        if key != self.value_key:
+            self.value_surface = self.font.render(str(self.value), 1, colour)
+            self.value_key = key
+        text_surface = self.value_surface
         dest = (self.slider_range[1] + self.offset, self.rect.centery - self.num_h // 2)
         surface.blit(text_surface, dest)
 
 
+# how long an idle menu sleeps between checks when nothing happens, in milliseconds
+MENU_IDLE_TIMEOUT = 250
+
+
+def wait_events(timeout=MENU_IDLE_TIMEOUT):
+    """
+    Blocks until an event arrives or timeout milliseconds pass instead of polling every frame
+
+    :param timeout: Int
+    :return: List of every pending event. Empty on timeout
+    """
+
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
 def clamp(n, small, large):
     """
     Clips a number to be within the interval [small, large]
@@ -171,12 +218,8 @@ def main():
 
     mouse_down = False
 
-    rand_nums = [i for i in range(6)]
-    music_path = MUSIC_LIST[rand_nums.pop(random.randint(0, len(rand_nums) - 1))]
-    current_track = pygame.mixer.Sound(music_path)
-    track_length = current_track.get_length()
-    start_time = time.time()
-    current_track.play()
+    music = MusicPlayer(MUSIC_LIST)
+    music.play()
 
     # image Designed by Freepik
     bg_img = pygame.image.load("Images//Title_bg.jpg")
@@ -204,18 +247,9 @@ def main():
                 mouse_down = True
             elif event.type == pygame.MOUSEBUTTONUP:
                 mouse_down = False
-
-        # begin next song when each finishes
-        if time.time() - start_time >= track_length:
-            music_path = MUSIC_LIST[rand_nums.pop(random.randint(0, len(rand_nums) - 1))]
-            current_track = pygame.mixer.Sound(music_path)
-            track_length = current_track.get_length()
-            start_time = time.time()
-            current_track.play()
-
-            # refill song list when all are exhausted
-            if len(rand_nums) == 0:
-                rand_nums = [i for i in range(6)]
+            elif event.type == pygame.USEREVENT:
+                # begin next song when each finishes
+                music.on_end()
 
         # screen.fill((0, 0, 0))
         window.blit(bg_img, (0, 0))
@@ -235,7 +269,8 @@ def main():
         my_slider.draw(window, (255, 255, 255))
 
         # sets the volume. Value must be from 0.0-1.0 and self.value is from 0-100
-        current_track.set_volume(my_slider.value / 100)
+        music.set_volume(my_slider.value / 100)
+        music.update()
 
         pygame.display.flip()
         clock.tick(165)
@@ -0,0 +1,58 @@
+import numpy as np
+import cv2
+
+
+# decides how much of a frame colour detection needs to look at by differencing it with the last one at a tiny
+# resolution. a static scene needs no detection at all, the last blobs still hold. otherwise only the box around
+# everything that changed, grown by margin pixels, is worth searching. every max_skip skipped frames a full
+# search is forced anyway so a slow change can't hide forever
+class MotionGate:
+    def __init__(self, size=(80, 60), threshold=15, min_changed=3, margin=40, max_skip=15):
+        self.size = size
+        self.threshold = threshold  # grey level change that counts as motion
+        self.min_changed = min_changed  # fewest changed low res pixels that count as the scene moving
+        self.margin = margin
+        self.max_skip = max_skip
+
+        w, h = size
+        self.small = np.empty((h, w, 3), np.uint8)
+        self.grey = np.empty((h, w), np.uint8)
+        self.prev = np.empty((h, w), np.uint8)
+        self.diff = np.empty((h, w), np.uint8)
+        self.primed = False
+        self.skipped = 0
+
+    # returns None when nothing moved, otherwise the (x, y, w, h) part of frame to search in full frame pixels
+    def check(self, frame):
+        frame_h, frame_w = frame.shape[:2]
+        # linear only samples a few pixels per cell. area averaging is smoother but costs more than it saves
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.grey)
+
+        if not self.primed:
+            self.primed = True
+            self.prev, self.grey = self.grey, self.prev
+            return 0, 0, frame_w, frame_h
+
+        cv2.absdiff(self.grey, self.prev, dst=self.diff)
+        cv2.threshold(self.diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self.diff)
+        self.prev, self.grey = self.grey, self.prev
+
+        if cv2.countNonZero(self.diff) < self.min_changed:
+            self.skipped += 1
+            if self.skipped < self.max_skip:
+                return None
+            self.skipped = 0
+            return 0, 0, frame_w, frame_h
+
+        self.skipped = 0
+
+        # map the changed box back to the frame and grow it so blob edges just outside it are still found
+        x, y, w, h = cv2.boundingRect(self.diff)
+        sx = frame_w / self.size[0]
+        sy = frame_h / self.size[1]
+        x1 = max(0, int(x * sx) - self.margin)
+        y1 = max(0, int(y * sy) - self.margin)
+        x2 = min(frame_w, int((x + w) * sx) + self.margin)
+        y2 = min(frame_h, int((y + h) * sy) + self.margin)
+        return x1, y1, x2 - x1, y2 - y1
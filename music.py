@@ -0,0 +1,90 @@
+import random
+import threading
+
+import pygame
+
+
+# streams background music through pygame.mixer.music instead of decoding whole tracks into Sounds.
+# the next track is picked and read from disk on a background thread while the current one plays, then queued
+# so it starts without a gap. tracks are shuffled like a deck so none repeat until all have played
+class MusicPlayer:
+    def __init__(self, tracks, end_event=pygame.USEREVENT):
+        self.tracks = list(tracks)
+        self.end_event = end_event
+        self.bag = []
+        self.last = None
+        self.current = None
+        self.queued = None
+
+        self.ready = None  # next track, checked and warmed by the prefetch thread
+        self.prefetch_thread = None
+
+    # deals the next track from the shuffled bag, refilling it when empty without repeating the last track
+    def next_track(self):
+        if not self.bag:
+            self.bag = self.tracks.copy()
+            random.shuffle(self.bag)
+            if len(self.bag) > 1 and self.bag[-1] == self.last:
+                self.bag[0], self.bag[-1] = self.bag[-1], self.bag[0]
+
+        self.last = self.bag.pop()
+        return self.last
+
+    # skips missing or unreadable tracks. reading the file pulls it into the os cache so queueing doesn't hit disk
+    def find_playable(self):
+        for i in range(len(self.tracks)):
+            path = self.next_track()
+            try:
+                with open(path, 'rb') as f:
+                    while f.read(1 << 16):
+                        pass
+                return path
+            except OSError:
+                print(f"could not read {path}")
+        return None
+
+    def prefetch(self):
+        self.ready = None
+        self.prefetch_thread = threading.Thread(target=self._prefetch, name="MusicPrefetch", daemon=True)
+        self.prefetch_thread.start()
+
+    def _prefetch(self):
+        self.ready = self.find_playable()
+
+    def play(self):
+        # only waits on the prefetch thread if the music ran out before it finished
+        if self.prefetch_thread is not None:
+            self.prefetch_thread.join()
+            self.prefetch_thread = None
+        path = self.ready or self.find_playable()
+        if path is None:
+            return
+
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.set_endevent(self.end_event)
+        pygame.mixer.music.play()
+        self.current = path
+        self.queued = None
+        self.prefetch()
+
+    # call once a frame. queues the prefetched track as soon as the background read has finished
+    def update(self):
+        if self.queued is None and self.prefetch_thread is not None and not self.prefetch_thread.is_alive():
+            self.prefetch_thread = None
+            if self.ready is not None:
+                pygame.mixer.music.queue(self.ready)
+                self.queued = self.ready
+
+    # call on end_event. the queued track has taken over, so start fetching the one after it.
+    # if nothing was queued in time the music stopped and the next track is started directly
+    def on_end(self):
+        if self.queued is not None and pygame.mixer.music.get_busy():
+            self.current = self.queued
+            self.queued = None
+            self.prefetch()
+        else:
+            self.play()
+
+    # volume from 0.0-1.0
+    def set_volume(self, volume):
+        pygame.mixer.music.set_volume(volume)
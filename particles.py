@@ -0,0 +1,78 @@
+import numpy as np
+import pygame
+
+
+# every particle lives in a slot of a set of numpy arrays so emitting, moving, culling and drawing a whole
+# burst is a handful of array operations instead of one python object per particle
+class ParticleSystem:
+    def __init__(self, capacity=4096, size=3, gravity=0.5):
+        self.size = size
+        self.gravity = gravity
+
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.v = np.zeros((capacity, 2), np.float32)
+        self.colour = np.zeros((capacity, 3), np.uint8)
+        self.alive = np.zeros(capacity, bool)
+
+        # offsets of every pixel in a particle's square, drawn all at once
+        dx, dy = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+        self.square = np.stack((dx.ravel(), dy.ravel()), axis=-1)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    # launches count particles from pos in random directions at up to strength pixels per time unit
+    def emit(self, pos, count, strength, colour):
+        free = np.flatnonzero(~self.alive)
+        if len(free) < count:
+            self.grow(len(self.alive) - len(free) + count)
+            free = np.flatnonzero(~self.alive)
+        slots = free[:count]
+
+        angle = np.random.random(count) * np.pi * 2
+        speed = np.random.random(count) * strength
+
+        self.pos[slots] = pos
+        self.v[slots, 0] = speed * np.cos(angle)
+        self.v[slots, 1] = speed * -np.sin(angle)
+        self.colour[slots] = colour[:3]
+        self.alive[slots] = True
+
+    # at least doubles the number of slots so repeated bursts don't regrow every time
+    def grow(self, needed):
+        capacity = max(needed, len(self.alive) * 2)
+        extra = capacity - len(self.alive)
+
+        self.pos = np.concatenate((self.pos, np.zeros((extra, 2), np.float32)))
+        self.v = np.concatenate((self.v, np.zeros((extra, 2), np.float32)))
+        self.colour = np.concatenate((self.colour, np.zeros((extra, 3), np.uint8)))
+        self.alive = np.concatenate((self.alive, np.zeros(extra, bool)))
+
+    # dt is in whatever time unit gravity and velocity use. 1 keeps everything per frame
+    def update(self, dt=1):
+        self.v[:, 1] += self.gravity * dt
+        self.pos += self.v * dt
+
+    # frees every particle that has fallen below the bottom of the screen
+    def cull(self, height):
+        self.alive &= self.pos[:, 1] <= height
+
+    # writes every live particle's square straight into the surface's pixels
+    def draw(self, surface):
+        live = np.flatnonzero(self.alive)
+        if len(live) == 0:
+            return
+
+        corners = self.pos[live].astype(np.int32)
+        pixels_xy = (corners[:, None, :] + self.square[None, :, :]).reshape(-1, 2)
+        colours = np.repeat(self.colour[live], len(self.square), axis=0)
+
+        width, height = surface.get_size()
+        on_screen = (
+            (pixels_xy[:, 0] >= 0) & (pixels_xy[:, 0] < width) &
+            (pixels_xy[:, 1] >= 0) & (pixels_xy[:, 1] < height)
+        )
+
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[pixels_xy[on_screen, 0], pixels_xy[on_screen, 1]] = colours[on_screen]
+        del pixels  # unlocks the surface
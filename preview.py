@@ -0,0 +1,36 @@
+import time
+
+import numpy as np
+import cv2
+import pygame
+
+
+# shows camera frames on a pygame surface without allocating anything per frame. the frame is shrunk to the
+# panel size in opencv first, converted to RGB once into a buffer that never moves, and the surface is a view of
+# that buffer made with pygame.image.frombuffer. fps limits how often the preview refreshes, independent of
+# how often frames are tracked
+class CameraPreview:
+    def __init__(self, size, fps=None):
+        self.size = (int(size[0]), int(size[1]))
+        w, h = self.size
+
+        self.small = np.empty((h, w, 3), np.uint8)
+        self.rgb = np.empty((h, w, 3), np.uint8)
+        self.surface = pygame.image.frombuffer(self.rgb, self.size, "RGB")
+
+        self.set_fps(fps)
+        self.last_update = -float("inf")
+
+    # None or 0 refreshes on every frame
+    def set_fps(self, fps):
+        self.interval = 1 / fps if fps else 0
+
+    # True when enough time has passed for another refresh
+    def due(self):
+        return time.perf_counter() - self.last_update >= self.interval
+
+    def update(self, frame):
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        self.last_update = time.perf_counter()
+        return self.surface
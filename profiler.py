@@ -0,0 +1,199 @@
+import atexit
+import json
+import time
+
+import numpy as np
+import pygame
+
+# every part of a frame worth timing, in the order they run
+STAGES = ("capture", "motion", "hsv", "mask", "dilate", "contours", "merge", "sim", "render", "scale", "flip")
+
+
+# times one stage. the time is added to the frame so a stage can be entered more than once per frame
+class _Stage:
+    __slots__ = ("times", "ran", "index", "start")
+
+    def __init__(self, times, ran, index):
+        self.times = times
+        self.ran = ran
+        self.index = index
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.times[self.index] += time.perf_counter() - self.start
+        self.ran[self.index] = True
+        return False
+
+
+# stands in for every stage while profiling is off so the hooks cost next to nothing
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+# per stage timings of the main loop. each stage keeps its last window samples in a ring so percentiles follow
+# the recent frames. every frame profiled while enabled is streamed to path as a json line, so a long session
+# holds nothing but the ring in memory. the file is opened on the first profiled frame and closed at exit
+class FrameProfiler:
+    def __init__(self, stages=STAGES, window=300, path=None, refresh=0.5):
+        self.names = tuple(stages) + ("frame",)
+        self.window = window
+        self.path = path
+        self.refresh = refresh  # seconds between overlay redraws
+        self.enabled = False
+
+        self.times = [0.0] * len(self.names)
+        self.ran = [False] * len(self.names)
+        self.stages = {name: _Stage(self.times, self.ran, i) for i, name in enumerate(stages)}
+
+        self.samples = np.zeros((len(self.names), window))
+        self.counts = np.zeros(len(self.names), np.int64)
+
+        self.frame_start = 0.0
+        self.frame_id = 0
+        self.partial = False  # the frame profiling was turned on in only ran from then on
+        self.file = None
+        self.written = 0
+
+        self.notes = {}  # label -> value shown under the table, like counters that aren't timings
+        self.font = None
+        self.lines = []
+        self.drawn_at = 0.0
+
+        atexit.register(self.close)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_start = time.perf_counter()
+        self.drawn_at = 0.0
+
+        self.partial = self.enabled
+
+        # a frame cut short by the toggle would otherwise be filed with the next one
+        for i in range(len(self.names)):
+            self.times[i] = 0.0
+            self.ran[i] = False
+
+    # shows value next to label under the timings while the overlay is on
+    def note(self, label, value):
+        if self.enabled:
+            self.notes[label] = value
+
+    # use as: with profiler.stage("mask"): ...
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_STAGE
+        return self.stages[name]
+
+    # for stages that span too much code for a with block
+    def start(self, name):
+        if self.enabled:
+            self.stages[name].__enter__()
+
+    def stop(self, name):
+        if self.enabled:
+            self.stages[name].__exit__(None, None, None)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = time.perf_counter()
+
+    # files the stages that ran this frame and clears them for the next one
+    def end_frame(self):
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        self.times[-1] = now - self.frame_start
+        self.ran[-1] = True
+
+        record = {}
+        for i, name in enumerate(self.names):
+            if self.ran[i] and not self.partial:
+                self.samples[i, self.counts[i] % self.window] = self.times[i]
+                self.counts[i] += 1
+                record[name] = self.times[i] * 1000
+            self.times[i] = 0.0
+            self.ran[i] = False
+
+        if self.partial:
+            self.partial = False
+            return
+
+        self.frame_id += 1
+        self.write(self.frame_id, now, record)
+
+    def write(self, frame_id, timestamp, record):
+        if self.path is None:
+            return
+
+        try:
+            if self.file is None:
+                self.file = open(self.path, 'w')
+            self.file.write(json.dumps({"frame": frame_id, "time": timestamp, "ms": record}) + "\n")
+        except OSError as error:
+            # keep profiling on screen but stop trying to write
+            print(f"could not write profile to {self.path}: {error}")
+            self.path = None
+            return
+
+        self.written += 1
+
+    # {stage: (p50, p95, p99)} in milliseconds over the recent window. stages with no samples are left out
+    def percentiles(self):
+        result = {}
+        for i, name in enumerate(self.names):
+            count = min(self.counts[i], self.window)
+            if count:
+                result[name] = tuple((np.percentile(self.samples[i, :count], (50, 95, 99)) * 1000).tolist())
+        return result
+
+    # draws the percentile table with its top left corner at pos. text is rebuilt every refresh seconds
+    def draw(self, surface, pos, colour=(255, 255, 255)):
+        if not self.enabled:
+            return
+
+        if self.font is None:
+            self.font = pygame.font.Font(None, 24)
+
+        now = time.perf_counter()
+        if now - self.drawn_at >= self.refresh:
+            self.drawn_at = now
+            rows = [("ms", "p50", "p95", "p99")]
+            for name, values in self.percentiles().items():
+                rows.append((name, *(f"{value:.2f}" for value in values)))
+            for label, value in self.notes.items():
+                rows.append((label, str(value)))
+            self.lines = [[self.font.render(cell, True, colour) for cell in row] for row in rows]
+
+        # the default font isn't monospaced so every column is placed on its own
+        x, y = pos
+        for line in self.lines:
+            surface.blit(line[0], (x, y))
+            for i, cell in enumerate(line[1:]):
+                surface.blit(cell, (x + 80 + 60 * (i + 1) - cell.get_width(), y))
+            y += line[0].get_height()
+
+    # finishes the profile file. called when the program exits
+    def close(self):
+        if self.file is None:
+            return
+
+        self.file.close()
+        self.file = None
+        print(f"{self.written} profiled frames written to {self.path}")
+
+profiler = FrameProfiler(path="profile.jsonl")
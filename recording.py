@@ -0,0 +1,197 @@
+import atexit
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+import cv2
+
+# a recording is a 64 byte header followed by one record per frame: a float64 timestamp in seconds and the raw
+# BGR frame. every record is the same size so the file can be memory mapped as one structured array.
+# frames are stored uncompressed on purpose. replay hands out views of the mapped file without decoding anything
+# and detection sees exactly the pixels the camera delivered, which lossy video would change. the cost is size:
+# width * height * 3 + 8 bytes a frame, so 921 KB at 640x480 or about 27 MB a second at 30 fps, and 6.2 MB a
+# frame at 1080p. keep recordings short
+MAGIC = b"SLICEREC"
+VERSION = 1
+HEADER = struct.Struct("<8sIIII")  # magic, version, width, height, channels
+HEADER_SIZE = 64
+
+
+def record_dtype(height, width, channels):
+    return np.dtype([("time", "<f8"), ("frame", "u1", (height, width, channels))])
+
+
+# True when path is a file written by FrameRecorder
+def is_recording(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# writes frames and their capture timestamps to path. the file is opened on the first frame so its size comes
+# from the camera. writing happens on a background thread so the game loop only pays for queueing the frame.
+# at most max_bytes of frames wait to be written, whatever the resolution. anything still queued is written when
+# the program exits
+class FrameRecorder:
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.queue = queue.Queue()
+        self.max_bytes = max_bytes
+        self.queued_bytes = 0
+        self.space = threading.Condition()
+        self.shape = None
+        self.count = 0
+        self.thread = threading.Thread(target=self._run, name="FrameRecorder", daemon=True)
+        self.thread.start()
+
+        atexit.register(self.close)
+
+    # frames must not be changed after they are written. the game only ever draws on flipped copies
+    def write(self, frame, timestamp):
+        if self.shape is None:
+            self.shape = frame.shape
+        elif frame.shape != self.shape:
+            raise ValueError(f"frame shape {frame.shape} does not match the recording's {self.shape}")
+
+        # blocks rather than drops when the disk falls behind so the recording stays complete. a single frame
+        # bigger than max_bytes still goes through once the queue is empty
+        with self.space:
+            while self.queued_bytes and self.queued_bytes + frame.nbytes > self.max_bytes:
+                self.space.wait()
+            self.queued_bytes += frame.nbytes
+        self.queue.put((timestamp, frame))
+        self.count += 1
+
+    def _run(self):
+        with open(self.path, 'wb') as f:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+
+                timestamp, frame = item
+                if f.tell() == 0:
+                    height, width, channels = frame.shape
+                    f.write(HEADER.pack(MAGIC, VERSION, width, height, channels).ljust(HEADER_SIZE, b"\0"))
+                f.write(struct.pack("<d", timestamp))
+                f.write(np.ascontiguousarray(frame, np.uint8).data)
+
+                with self.space:
+                    self.queued_bytes -= frame.nbytes
+                    self.space.notify()
+
+    # finishes writing every queued frame
+    def close(self):
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+        if self.count == 0:
+            os.remove(self.path)
+            return
+        print(f"{self.count} frames recorded to {self.path}")
+
+
+# plays a recording back with the same read/get/isOpened/release calls as cv2.VideoCapture. frames are read only
+# views into the memory mapped file so nothing is copied. realtime waits between frames as long as the recording
+# did, otherwise frames are served as fast as they are asked for. loop starts over at the end.
+# timestamp() gives each frame's recorded time so replays are timed like the original run, not by when they
+# happened to be read
+class ReplayCapture:
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.records = None
+        self.index = 0
+        self.start = None  # (wall clock, recording time) playback is anchored to
+
+        with open(path, 'rb') as f:
+            magic, version, width, height, channels = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+
+        dtype = record_dtype(height, width, channels)
+        # a recording cut short by a crash just loses its last partial frame
+        count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+        self.width = width
+        self.height = height
+        self.count = count
+        self.fps = (count - 1) / (self.records["time"][-1] - self.records["time"][0]) if count > 1 else 0
+
+    def isOpened(self):
+        return self.records is not None
+
+    def read(self):
+        if self.records is None:
+            return False, None
+
+        if self.index >= self.count:
+            if not self.loop:
+                return False, None
+            self.index = 0
+            self.start = None
+
+        record = self.records[self.index]
+        if self.start is None:
+            self.start = (time.perf_counter(), float(record["time"]))
+        elif self.realtime:
+            self.wait(record["time"])
+        self.index += 1
+
+        return True, record["frame"]
+
+    # sleeps until the frame recorded at timestamp is due
+    def wait(self, timestamp):
+        delay = self.start[0] + timestamp - self.start[1] - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    # recorded time of the frame read last, moved onto this run's time.perf_counter clock so the gaps between
+    # frames are the recorded ones
+    def timestamp(self):
+        return self.start[0] + float(self.records["time"][max(0, self.index - 1)]) - self.start[1]
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.count
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.index
+        return 0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.index = min(max(int(value), 0), self.count)
+            self.start = None
+            return True
+        return False
+
+    def release(self):
+        # dropping the memmap closes the file once no frame views are left
+        self.records = None
+
+
+# opens a camera index, a video file or a recording. index strings like "1" from the command line are cameras
+def open_capture(source=0, realtime=True):
+    if isinstance(source, str):
+        if source.isdigit():
+            return cv2.VideoCapture(int(source))
+        if is_recording(source):
+            return ReplayCapture(source, realtime)
+    return cv2.VideoCapture(source)
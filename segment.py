@@ -0,0 +1,59 @@
+from collections import namedtuple
+
+import numpy as np
+import cv2
+
+from profiler import profiler
+
+# blobs found in a frame as parallel arrays. boxes is (n, 4) x, y, w, h, areas is (n,) and centroids is (n, 2),
+# all in full frame pixels. main.game_scale maps them onto the play area
+Blobs = namedtuple("Blobs", ["boxes", "areas", "centroids"])
+
+
+def empty_blobs():
+    return Blobs(np.empty((0, 4), np.int32), np.empty(0), np.empty((0, 2)))
+
+
+# turns rows of cv2.connectedComponentsWithStats output into Blobs, dropping anything smaller than min_area.
+# the background row must already be removed. scale and offset map from the searched image back to the full frame
+def blobs_from_stats(stats, centroids, min_area, scale=1, offset=(0, 0)):
+    keep = np.flatnonzero(stats[:, cv2.CC_STAT_AREA] > min_area)
+    stats = stats[keep]
+
+    boxes = np.rint(stats[:, :4] / scale).astype(np.int32)
+    boxes[:, 0] += offset[0]
+    boxes[:, 1] += offset[1]
+    areas = stats[:, cv2.CC_STAT_AREA] / scale**2
+    centres = centroids[keep] / scale + offset
+
+    return Blobs(boxes, areas, centres)
+
+
+# finds the blobs of several tracked colours. colours searched for in the same window share one shrink and hsv
+# conversion, then each is thresholded, dilated and labelled in its own Colour's buffers so two blades held close
+# together stay two blobs. dilation and labelling can't be shared without merging them again, so the cost still
+# grows with every colour, though only by the size of its window while it is tracked
+class Segmenter:
+    # colours is the Colour of every tracked colour. they must all classify the same way, with or without a table
+    def __init__(self, colours):
+        self.colours = list(colours)
+
+    # rois is the (x, y, w, h) window to search for each colour, or None for the full frame. returns one Blobs per
+    # colour in full frame coordinates
+    def segment(self, frame, rois, scale, kernel_size):
+        windows = {}
+        for i, roi in enumerate(rois):
+            windows.setdefault(roi, []).append(i)
+
+        found = [None] * len(self.colours)
+        for roi, members in windows.items():
+            first = self.colours[members[0]]
+            with profiler.stage("hsv"):
+                data = first.convert(first.shrink(frame, roi, scale))
+
+            for i in members:
+                colour = self.colours[i].process_converted(data, first.offset, scale, kernel_size)
+                with profiler.stage("contours"):
+                    found[i] = colour.get_blobs()
+
+        return found
@@ -0,0 +1,84 @@
+import atexit
+import os
+import stat
+import tempfile
+import threading
+
+
+# settings.txt loaded once and served from memory. changes are coalesced and written back after delay seconds
+# without another change, or when the program exits. writes go to a temp file that replaces the real one so a
+# crash mid write can't leave it half written
+class Settings:
+    def __init__(self, path, delay=1.0):
+        self.path = path
+        self.delay = delay
+        self.values = {}
+        self.dirty = False
+        self.lock = threading.RLock()
+        self.timer = None
+
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                for line in f.readlines():
+                    line_text = line.split()
+                    if len(line_text) < 2:
+                        continue
+                    self.values[line_text[0].strip(':')] = self.parse(line_text[1])
+        except OSError:
+            print("error reading file")
+
+    # numbers come back as numbers, anything else as the text in the file
+    @staticmethod
+    def parse(text):
+        for kind in (int, float):
+            try:
+                return kind(text)
+            except ValueError:
+                pass
+        return text
+
+    def get(self, label, default=None):
+        return self.values.get(label, default)
+
+    # new labels are added to the file rather than dropped
+    def set(self, label, value):
+        with self.lock:
+            if self.values.get(label) == value:
+                return
+            self.values[label] = value
+            self.dirty = True
+
+            # restart the timer so a slider being dragged only writes once it settles
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".settings", suffix=".tmp")
+                with os.fdopen(fd, 'w') as f:
+                    f.writelines(f"{label}: {value}\n" for label, value in self.values.items())
+                # mkstemp makes the file readable by its owner only. keep the permissions settings.txt already had
+                if os.path.exists(self.path):
+                    os.chmod(temp_path, stat.S_IMODE(os.stat(self.path).st_mode))
+                os.replace(temp_path, self.path)
+                self.dirty = False
+            except OSError:
+                print("error writing file")
+
+
+settings = Settings("settings.txt")
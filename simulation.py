@@ -0,0 +1,39 @@
+import time
+
+
+# runs the simulation in fixed steps of simulated seconds no matter how fast frames are rendered or captured.
+# real time is added to an accumulator and whole steps are taken out of it. what is left over is alpha, how far
+# rendering is between the last two steps, so positions can be interpolated instead of jumping
+class FixedStep:
+    def __init__(self, rate, max_steps=8):
+        self.dt = 1 / rate
+        self.max_steps = max_steps  # stops a long stall from being replayed as a burst of steps
+        self.accumulator = 0
+        self.time = 0  # simulated seconds so far
+        self.last = None
+
+    # yields dt once for every step that is due since the last call
+    def steps(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.accumulator += min(now - self.last, self.max_steps * self.dt)
+        self.last = now
+
+        while self.accumulator >= self.dt:
+            self.accumulator -= self.dt
+            self.time += self.dt
+            yield self.dt
+
+    # fraction of a step between the last simulated state and now
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+    # forgets the time spent away, like in a menu, so it isn't simulated on return
+    def pause(self):
+        self.last = None
+        self.accumulator = 0
+
+
+def lerp(a, b, t):
+    return a + (b - a) * t
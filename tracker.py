@@ -0,0 +1,87 @@
+import numpy as np
+
+
+# constant velocity kalman filter for one blade. state is x, y, vx, vy in pixels and pixels per second.
+# it is fed one measurement per camera frame, or None when the blade wasn't found, and can be asked where the
+# blade is at any later time, which is how input latency is hidden
+class BladeTracker:
+    # accel is how hard the blade is expected to change speed, in pixels per second squared. noise is the
+    # measurement error in pixels. the blade coasts on its last velocity for up to max_coast seconds when lost
+    def __init__(self, pos, accel=4000, noise=3, max_coast=0.25):
+        self.x = np.array([pos[0], pos[1], 0, 0], float)
+        self.P = np.diag([1e4, 1e4, 1e6, 1e6])
+        self.accel = accel
+        self.R = np.eye(2) * noise**2
+        self.max_coast = max_coast
+
+        self.time = None  # time of the current state
+        self.last_seen = None
+
+    @property
+    def pos(self):
+        return self.x[:2].copy()
+
+    @property
+    def vel(self):
+        return self.x[2:].copy()
+
+    # True once the blade has been missing for longer than it is allowed to coast
+    @property
+    def lost(self):
+        return self.last_seen is None or self.time - self.last_seen > self.max_coast
+
+    def predict_to(self, t):
+        if self.time is None:
+            self.time = t
+            return
+        dt = t - self.time
+        if dt <= 0:
+            return
+
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+
+        # white noise acceleration
+        q = self.accel**2
+        Q = np.zeros((4, 4))
+        Q[0, 0] = Q[1, 1] = q * dt**4 / 4
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = q * dt**3 / 2
+        Q[2, 2] = Q[3, 3] = q * dt**2
+
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+        self.time = t
+
+    # measurement is an (x, y) blade position seen at time t, or None if it wasn't seen
+    def update(self, measurement, t):
+        self.predict_to(t)
+
+        if measurement is None:
+            # stop coasting once the blade has been gone too long instead of flying off screen
+            if self.lost:
+                self.x[2:] = 0
+            return
+
+        H = np.zeros((2, 4))
+        H[0, 0] = H[1, 1] = 1
+
+        innovation = np.asarray(measurement, float) - H @ self.x
+        S = H @ self.P @ H.T + self.R
+        K = self.P @ H.T @ np.linalg.inv(S)
+
+        self.x = self.x + K @ innovation
+        self.P = (np.eye(4) - K @ H) @ self.P
+        self.last_seen = t
+
+    # where the blade should be at time t without changing the filter
+    def predict(self, t):
+        if self.time is None or self.lost:
+            return self.pos
+        return self.x[:2] + self.x[2:] * (t - self.time)
+
+
+# one point per frame for a colour. blobs are averaged weighted by area so the biggest patch leads
+def blob_centre(blobs):
+    if len(blobs.areas) == 0:
+        return None
+    return (blobs.centroids * blobs.areas[:, None]).sum(axis=0) / blobs.areas.sum()
@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pygame
+
+
+# the blade trail as a fixed size ring of points. each swipe segment is filled with evenly spaced points in one
+# np.linspace call, every point shrinks together and dead points are simply skipped until overwritten.
+# circles are drawn from sprites rasterized once per radius and blitted in one Surface.blits call
+class Trail:
+    def __init__(self, capacity=4096, rad=8, colour=(255, 240, 0), spacing=1.0):
+        self.rad = rad
+        self.colour = colour
+        self.spacing = spacing  # pixels between points along a segment. bigger is a sparser, cheaper trail
+
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.radii = np.zeros(capacity, np.float32)
+        self.head = 0  # next slot to write
+
+        self.sprites = {}
+
+    # adds points from (x1, y1) to (x2, y2) inclusive
+    def add_line(self, x1, y1, x2, y2):
+        capacity = len(self.radii)
+        n = min(int(math.hypot(x2 - x1, y2 - y1) / self.spacing) + 1, capacity)
+
+        slots = (self.head + np.arange(n)) % capacity
+        self.pos[slots, 0] = np.linspace(x1, x2, n)
+        self.pos[slots, 1] = np.linspace(y1, y2, n)
+        self.radii[slots] = self.rad
+        self.head = (self.head + n) % capacity
+
+    def update(self, shrink):
+        np.subtract(self.radii, shrink, out=self.radii, where=self.radii > 0)
+
+    def sprite(self, r):
+        if r not in self.sprites:
+            img = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+            pygame.draw.circle(img, self.colour, (r, r), r)
+            self.sprites[r] = img
+        return self.sprites[r]
+
+    def draw(self, surface):
+        live = np.flatnonzero(self.radii >= 0.5)
+        if len(live) == 0:
+            return
+
+        radii = np.rint(self.radii[live]).astype(np.int32)
+        corners = (self.pos[live] - radii[:, None]).astype(np.int32).tolist()
+        surface.blits([(self.sprite(r), corner) for r, corner in zip(radii.tolist(), corners)], doreturn=False)
@@ -0,0 +1,104 @@
+import atexit
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# runs detection in its own process so opencv work and the game's simulation and drawing stop stalling each other.
+# frames go through two shared memory buffers: the worker reads one while the game copies the next camera frame
+# into the other. only the small Blobs results are sent back through a pipe. the worker is shut down and the
+# shared memory freed when the program exits.
+# detect is called as detect(frame, *params, *args) in the worker and must be a module level function. params
+# change with every frame and args are fixed when the worker starts
+class VisionWorker:
+    def __init__(self, frame_shape, detect, *args):
+        self.shape = tuple(frame_shape)
+        size = int(np.prod(self.shape))
+
+        self.buffers = [shared_memory.SharedMemory(create=True, size=size) for i in range(2)]
+        self.frames = [np.ndarray(self.shape, np.uint8, buffer=buffer.buf) for buffer in self.buffers]
+
+        self.in_flight = None  # slot the worker is reading
+        self.staged = None  # (slot, timestamp, rois) written but not sent yet
+
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=run_worker,
+            args=(child_conn, [buffer.name for buffer in self.buffers], self.shape, detect, args),
+            name="VisionWorker",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        atexit.register(self.close)
+
+    # hands a frame and its params to the worker. while it is busy the newest frame waits in the free buffer and replaces any
+    # older one waiting there, so the worker always gets the latest frame next
+    def submit(self, frame, timestamp, *params):
+        slot = 1 if self.in_flight == 0 else 0
+        np.copyto(self.frames[slot], frame)
+        self.staged = (slot, timestamp, params)
+        self._send()
+
+    def _send(self):
+        if self.in_flight is None and self.staged is not None:
+            self.conn.send(self.staged)
+            self.in_flight = self.staged[0]
+            self.staged = None
+
+    # returns (timestamp, blobs, seconds spent detecting) for the newest finished frame, or None when nothing new
+    # has finished. never blocks
+    def poll(self):
+        result = None
+        while self.in_flight is not None and self.conn.poll():
+            result = self.conn.recv()
+            self.in_flight = None
+            self._send()
+        return result
+
+    def close(self):
+        if self.process is None:
+            return
+
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+        self.conn.close()
+
+        # views into the buffers have to go before the memory can be closed
+        self.frames = []
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        self.buffers = []
+
+
+def run_worker(conn, names, shape, detect, args):
+    buffers = [shared_memory.SharedMemory(name=name) for name in names]
+    frames = [np.ndarray(shape, np.uint8, buffer=buffer.buf) for buffer in buffers]
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+
+            slot, timestamp, params = message
+            start = time.perf_counter()
+            blobs = detect(frames[slot], *params, *args)
+            conn.send((timestamp, blobs, time.perf_counter() - start))
+    finally:
+        frames = []
+        for buffer in buffers:
+            buffer.close()